@@ -1,8 +1,61 @@
 from django.contrib import admin
-from .models import LINEUser, OdooJWTToken
+from django.db import transaction
+from .models import (
+    LINEUser, OdooJWTToken,
+    PolicyTemplate, TemplateOrigin, TemplateEndpoint, TemplateScope,
+)
+from .utils.policy_cache import forget_deleted_templates, forget_deleted_tokens, invalidate_token_policy
+from .utils.policy_versions import bump_template_version
 
-admin.site.register(OdooJWTToken)
+
+@admin.register(OdooJWTToken)
+class OdooJWTTokenAdmin(admin.ModelAdmin):
+    list_display = ("name", "user_id", "policy_template", "expires_at", "created_at")
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        token = form.instance
+        transaction.on_commit(lambda: invalidate_token_policy(token))
+
+    def delete_model(self, request, obj):
+        forget_deleted_tokens([obj])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        forget_deleted_tokens(queryset)
+        super().delete_queryset(request, queryset)
 
 @admin.register(LINEUser)
 class LINEUserAdmin(admin.ModelAdmin):
     list_display = ("user_id", "display_name", "created_at", "updated_at")
+
+
+class TemplateOriginInline(admin.TabularInline):
+    model = TemplateOrigin
+    extra = 0
+
+class TemplateEndpointInline(admin.TabularInline):
+    model = TemplateEndpoint
+    extra = 0
+
+class TemplateScopeInline(admin.TabularInline):
+    model = TemplateScope
+    extra = 0
+
+@admin.register(PolicyTemplate)
+class PolicyTemplateAdmin(admin.ModelAdmin):
+    list_display = ("name", "updated_at")
+    inlines = [TemplateOriginInline, TemplateEndpointInline, TemplateScopeInline]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        template_id = form.instance.pk
+        transaction.on_commit(lambda: bump_template_version(template_id))
+
+    def delete_model(self, request, obj):
+        forget_deleted_templates([obj])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        forget_deleted_templates(queryset)
+        super().delete_queryset(request, queryset)
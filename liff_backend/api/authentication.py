@@ -0,0 +1,14 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from api.utils.auth_context import get_auth_context
+
+
+class ContextJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        context = get_auth_context(request)
+        if context.header_error:
+            raise context.header_error
+        if context.raw_token is None:
+            return None
+
+        validated_token = context.get_validated_token()
+        return context.get_user(), validated_token
@@ -0,0 +1,120 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import OdooJWTToken, AllowedOrigin, AllowedEndpoint, PermissionScope
+from api.utils.policy_writes import apply_token_policy
+
+
+def legacy_setup(token_record, data):
+    AllowedOrigin.objects.filter(token=token_record).delete()
+    for origin in data.get('allowed_origins', []):
+        AllowedOrigin.objects.create(token=token_record, origin=origin)
+
+    AllowedEndpoint.objects.filter(token=token_record).delete()
+    for path in data.get('allowed_endpoints', []):
+        AllowedEndpoint.objects.create(token=token_record, path=path)
+
+    PermissionScope.objects.filter(token=token_record).delete()
+    for scope in data.get('permission_scopes', []):
+        PermissionScope.objects.create(
+            token=token_record,
+            model_name=scope['model_name'],
+            can_create=scope.get('can_create', False),
+            can_read=scope.get('can_read', False),
+            can_update=scope.get('can_update', False),
+            can_delete=scope.get('can_delete', False),
+            can_approve=scope.get('can_approve', False),
+            can_reject=scope.get('can_reject', False),
+        )
+
+
+def legacy_update(token_record, data):
+    for origin in data.get('allowed_origins', []):
+        if not AllowedOrigin.objects.filter(token=token_record, origin=origin).exists():
+            AllowedOrigin.objects.create(token=token_record, origin=origin)
+
+    for endpoint in data.get('allowed_endpoints', []):
+        if not AllowedEndpoint.objects.filter(token=token_record, path=endpoint).exists():
+            AllowedEndpoint.objects.create(token=token_record, path=endpoint)
+
+    for scope in data.get('permission_scopes', []):
+        obj, created = PermissionScope.objects.get_or_create(token=token_record, model_name=scope['model_name'])
+        updated = False
+        for field in ["can_create", "can_read", "can_update", "can_delete", "can_approve", "can_reject"]:
+            if field in scope and getattr(obj, field) != scope[field]:
+                setattr(obj, field, scope[field])
+                updated = True
+        if updated:
+            obj.save()
+
+
+class Command(BaseCommand):
+    help = "Compare round trips of the legacy and diff-based token policy writes. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', type=int, default=200)
+        parser.add_argument('--origins', type=int, default=10)
+        parser.add_argument('--scopes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        data = {
+            'allowed_origins': [f"https://app{i}.example.com" for i in range(options['origins'])],
+            'allowed_endpoints': [f"/v1/auto/erp/model{i}/read/" for i in range(options['endpoints'])],
+            'permission_scopes': [{'model_name': f"model{i}", 'can_read': True} for i in range(options['scopes'])],
+        }
+        # Half the entries changed, as in a typical policy edit
+        edit = {
+            'allowed_origins': data['allowed_origins'][::2] + ["https://new.example.com"],
+            'allowed_endpoints': data['allowed_endpoints'][::2] + [f"/v1/auto/erp/new{i}/read/" for i in range(options['endpoints'] // 2)],
+            'permission_scopes': [dict(scope, can_update=True) for scope in data['permission_scopes'][::2]],
+        }
+
+        cases = [
+            ("setup (empty)", lambda t: legacy_setup(t, data), lambda t: self.apply(t, data, True), None),
+            ("setup (edit)", lambda t: legacy_setup(t, edit), lambda t: self.apply(t, edit, True), data),
+            ("setup (unchanged)", lambda t: legacy_setup(t, data), lambda t: self.apply(t, data, True), data),
+            ("update (edit)", lambda t: legacy_update(t, edit), lambda t: self.apply(t, edit, False), data),
+        ]
+
+        self.stdout.write(f"{'case':<18} | {'legacy queries':>14} | {'legacy ms':>9} | {'diff queries':>12} | {'diff ms':>8}")
+        for name, legacy, current, initial in cases:
+            legacy_queries, legacy_ms = self.measure(legacy, initial)
+            diff_queries, diff_ms = self.measure(current, initial)
+            self.stdout.write(
+                f"{name:<18} | {legacy_queries:>14} | {legacy_ms:>9.1f} | {diff_queries:>12} | {diff_ms:>8.1f}"
+            )
+
+    def apply(self, token_record, data, replace):
+        apply_token_policy(
+            token_record,
+            origins=data['allowed_origins'],
+            endpoints=data['allowed_endpoints'],
+            scopes=data['permission_scopes'],
+            replace=replace,
+        )
+
+    def measure(self, write, initial):
+        with transaction.atomic():
+            token_record = OdooJWTToken.objects.create(
+                name='bench',
+                user_id=0,
+                session_id='bench',
+                access_token='bench-access',
+                refresh_token='bench-refresh',
+                expires_at=timezone.now() + timedelta(days=1),
+            )
+            if initial:
+                legacy_setup(token_record, initial)
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                write(token_record)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+        # Savepoint statements of the atomic block are round trips too
+        return len(queries), elapsed_ms
@@ -0,0 +1,73 @@
+import random
+import secrets
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import OdooJWTToken, token_digest
+
+
+class Command(BaseCommand):
+    help = "Benchmark OdooJWTToken lookup latency by raw access_token vs. indexed digest. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--lookups', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        lookups = options['lookups']
+        self.batch_size = options['batch_size']
+        self.samples = []
+
+        self.stdout.write(f"{'rows':>10} | {'raw p50':>9} | {'raw p95':>9} | {'digest p50':>10} | {'digest p95':>10}")
+        with transaction.atomic():
+            inserted = 0
+            for target in sorted(options['rows']):
+                inserted += self.fill(target - inserted)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {OdooJWTToken._meta.db_table}")
+
+                tokens = random.sample(self.samples, min(lookups, len(self.samples)))
+                raw = self.measure(lambda t: OdooJWTToken.objects.filter(access_token=t).first(), tokens)
+                digest = self.measure(lambda t: OdooJWTToken.objects.for_access_token(t).first(), tokens)
+                self.stdout.write(
+                    f"{target:>10} | {raw[0]:>7.3f}ms | {raw[1]:>7.3f}ms | {digest[0]:>8.3f}ms | {digest[1]:>8.3f}ms"
+                )
+            transaction.set_rollback(True)
+
+    def fill(self, count):
+        expires_at = timezone.now() + timedelta(days=1)
+        created = 0
+        while created < count:
+            batch = []
+            for _ in range(min(self.batch_size, count - created)):
+                access_token = secrets.token_urlsafe(210)
+                refresh_token = secrets.token_urlsafe(210)
+                batch.append(OdooJWTToken(
+                    name='bench',
+                    user_id=0,
+                    session_id='bench',
+                    access_token=access_token,
+                    refresh_token=refresh_token,
+                    access_token_digest=token_digest(access_token),
+                    refresh_token_digest=token_digest(refresh_token),
+                    expires_at=expires_at,
+                ))
+            OdooJWTToken.objects.bulk_create(batch)
+            self.samples.extend(token.access_token for token in random.sample(batch, min(len(batch), 50)))
+            created += len(batch)
+        return created
+
+    def measure(self, lookup, tokens):
+        timings = []
+        for token in tokens:
+            start = time.perf_counter()
+            lookup(token)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))]
@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils.token_sweeper import sweep_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired OdooJWTToken rows and their child rows in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.TOKEN_SWEEP_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=None)
+        parser.add_argument('--pause', type=float, default=0, help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        tokens, children = sweep_expired_tokens(
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause'],
+            report=self.report,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {tokens} tokens and {children} child rows in {elapsed:.2f}s"
+        ))
+
+    def report(self, batch, tokens, children, elapsed_ms):
+        self.stdout.write(f"batch {batch:>4}: {tokens:>6} tokens, {children:>6} child rows, {elapsed_ms:>8.1f}ms")
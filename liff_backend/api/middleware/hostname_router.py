@@ -1,19 +1,24 @@
-from django.utils.deprecation import MiddlewareMixin
-from api.models import AllowedOrigin, OdooJWTToken
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from api.utils.auth_context import get_auth_context
 
-class HostnameProjectRouterMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        host = request.get_host().lower()
-        request.project_denied = True
+class HostnameProjectRouterMiddleware:
+    sync_capable = True
+    async_capable = True
 
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            access_token = auth_header.split(" ")[1]
-            token = OdooJWTToken.objects.filter(access_token=access_token).first()
-            if token:
-                allowed_hosts = [
-                    origin.origin.replace("http://", "").replace("https://", "")
-                    for origin in AllowedOrigin.objects.filter(token=token)
-                ]
-                if host in allowed_hosts:
-                    request.project_denied = False
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        context = get_auth_context(request)
+        request.project_denied = not context.is_host_allowed(request.get_host().lower())
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        context = get_auth_context(request)
+        await context.aresolve_policy()
+        request.project_denied = not context.is_host_allowed(request.get_host().lower())
+        return await self.get_response(request)
@@ -0,0 +1,59 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from api.utils import metrics
+from api.utils.odoo_models import is_known_model
+
+AUTO_ACTIONS = frozenset({'create', 'read', 'update', 'delete', 'approve', 'reject'})
+
+
+class RequestMetricsMiddleware:
+    """Latency, Postgres query count and in-flight gauge per route; see api.utils.metrics."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def route_labels(self, request, response):
+        match = getattr(request, 'resolver_match', None)
+        labels = {'route': match.route if match else 'unmatched', 'status': f"{response.status_code // 100}xx"}
+        if match and 'module' in match.kwargs:
+            # Only registered models and known actions, so a caller cannot mint new series
+            module, action = match.kwargs['module'], match.kwargs.get('action')
+            labels['model'] = module if is_known_model(module) else 'other'
+            labels['action'] = action if action in AUTO_ACTIONS else 'other'
+        return labels
+
+    def record(self, request, response, started, queries):
+        labels = self.route_labels(request, response)
+        metrics.observe('gateway_request_duration_seconds', labels, time.perf_counter() - started)
+        metrics.observe('gateway_request_db_queries', labels, queries[0])
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        queries, token = metrics.start_query_count()
+        metrics.request_started()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.request_finished()
+            metrics.stop_query_count(token)
+        self.record(request, response, started, queries)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        queries, token = metrics.start_query_count()
+        metrics.request_started()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.request_finished()
+            metrics.stop_query_count(token)
+        self.record(request, response, started, queries)
+        return response
@@ -0,0 +1,48 @@
+import re
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from api.utils.logger import begin_log_context, end_log_context
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+
+class RequestIDMiddleware:
+    """
+    Tags the request with the caller's X-Request-ID, or a new one, for every
+    log line it produces and every Odoo call it makes; echoed in the response.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def request_id(self, request):
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        return incoming if REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_id = self.request_id(request)
+        token = begin_log_context(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_log_context(token)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
+
+    async def __acall__(self, request):
+        request_id = self.request_id(request)
+        token = begin_log_context(request_id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_log_context(token)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
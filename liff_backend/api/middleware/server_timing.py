@@ -0,0 +1,82 @@
+import contextvars
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from api.utils import server_timing
+from api.utils.logger import log_access
+
+
+class ServerTimingMiddleware:
+    """
+    Collects per-phase durations (auth, policy, db, redis, odoo by model and
+    method) for each request and returns them in the Server-Timing header
+    and the access log line.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.SERVER_TIMING or settings.ACCESS_LOG
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def finish(self, request, response, timings, started):
+        total = time.perf_counter() - started
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = timings.header(total)
+            # Browsers hide the timings from other origins unless allowed, like CORS
+            if response.has_header('Access-Control-Allow-Origin'):
+                response['Timing-Allow-Origin'] = response['Access-Control-Allow-Origin']
+        if settings.ACCESS_LOG:
+            if response.streaming:
+                self.log_after_stream(request, response, timings, started)
+            else:
+                log_access(request, response, total, timings)
+        return response
+
+    def log_after_stream(self, request, response, timings, started):
+        """A streamed response is logged once its last chunk is sent, with the time of every page."""
+        context = contextvars.copy_context()
+        content = response.streaming_content
+        done = lambda: context.run(log_access, request, response, time.perf_counter() - started, timings)
+
+        if response.is_async:
+            async def logged():
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    done()
+        else:
+            def logged():
+                try:
+                    yield from content
+                finally:
+                    done()
+        response.streaming_content = logged()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        started = time.perf_counter()
+        timings, token = server_timing.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            server_timing.end(token)
+        return self.finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        timings, token = server_timing.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            server_timing.end(token)
+        return self.finish(request, response, timings, started)
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_remove_odoojwttoken_project_token_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='odoojwttoken',
+            name='access_token_digest',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='odoojwttoken',
+            name='refresh_token_digest',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+    ]
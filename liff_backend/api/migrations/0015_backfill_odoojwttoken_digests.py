@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:25
+
+from django.db import migrations
+
+import hashlib
+
+BATCH_SIZE = 2000
+
+
+def backfill_digests(apps, schema_editor):
+    OdooJWTToken = apps.get_model('api', 'OdooJWTToken')
+    pending = OdooJWTToken.objects.filter(access_token_digest='').only('id', 'access_token', 'refresh_token')
+
+    batch = []
+    for token in pending.iterator(chunk_size=BATCH_SIZE):
+        token.access_token_digest = hashlib.sha256(token.access_token.encode()).hexdigest()
+        token.refresh_token_digest = hashlib.sha256(token.refresh_token.encode()).hexdigest()
+        batch.append(token)
+        if len(batch) >= BATCH_SIZE:
+            OdooJWTToken.objects.bulk_update(batch, ['access_token_digest', 'refresh_token_digest'])
+            batch = []
+    if batch:
+        OdooJWTToken.objects.bulk_update(batch, ['access_token_digest', 'refresh_token_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_odoojwttoken_access_token_digest_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_digests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_backfill_odoojwttoken_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PolicyTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TemplateOrigin',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.CharField(max_length=256)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='origins', to='api.policytemplate')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TemplateEndpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=512)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='endpoints', to='api.policytemplate')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='odoojwttoken',
+            name='policy_template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tokens', to='api.policytemplate'),
+        ),
+        migrations.CreateModel(
+            name='TemplateScope',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('can_create', models.BooleanField(default=False)),
+                ('can_read', models.BooleanField(default=False)),
+                ('can_update', models.BooleanField(default=False)),
+                ('can_delete', models.BooleanField(default=False)),
+                ('can_approve', models.BooleanField(default=False)),
+                ('can_reject', models.BooleanField(default=False)),
+                ('model_name', models.CharField(max_length=255)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scopes', to='api.policytemplate')),
+            ],
+            options={
+                'unique_together': {('template', 'model_name')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:32
+
+from django.db import migrations
+
+DEFAULT_TEMPLATE = 'liff-default'
+DEFAULT_ENDPOINTS = ['/e-learning/read/', '/km/create/']
+
+
+def create_default_template(apps, schema_editor):
+    PolicyTemplate = apps.get_model('api', 'PolicyTemplate')
+    TemplateEndpoint = apps.get_model('api', 'TemplateEndpoint')
+
+    template, created = PolicyTemplate.objects.get_or_create(name=DEFAULT_TEMPLATE)
+    if created:
+        TemplateEndpoint.objects.bulk_create([
+            TemplateEndpoint(template=template, path=path) for path in DEFAULT_ENDPOINTS
+        ])
+
+
+def delete_default_template(apps, schema_editor):
+    PolicyTemplate = apps.get_model('api', 'PolicyTemplate')
+    PolicyTemplate.objects.filter(name=DEFAULT_TEMPLATE).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_policytemplate_templateorigin_templateendpoint_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_template, delete_default_template),
+    ]
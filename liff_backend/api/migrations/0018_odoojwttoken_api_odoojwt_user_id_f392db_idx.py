@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_default_policy_template'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='odoojwttoken',
+            index=models.Index(fields=['user_id', 'expires_at'], name='api_odoojwt_user_id_f392db_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_odoojwttoken_api_odoojwt_user_id_f392db_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='odoojwttoken',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -2,6 +2,12 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
+import hashlib
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
 class LINEUser(models.Model):
     user_id = models.CharField(max_length=255, unique=True)
     display_name = models.CharField(max_length=255)
@@ -13,18 +19,94 @@ class LINEUser(models.Model):
     def __str__(self):
         return self.display_name
 
+class ScopeFlags(models.Model):
+    can_create = models.BooleanField(default=False)
+    can_read = models.BooleanField(default=False)
+    can_update = models.BooleanField(default=False)
+    can_delete = models.BooleanField(default=False)
+    can_approve = models.BooleanField(default=False)
+    can_reject = models.BooleanField(default=False)
+
+    class Meta:
+        abstract = True
+
+class PolicyTemplate(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+class TemplateOrigin(models.Model):
+    template = models.ForeignKey(PolicyTemplate, on_delete=models.CASCADE, related_name='origins')
+    origin = models.CharField(max_length=256)
+
+    def __str__(self):
+        return self.origin
+
+class TemplateEndpoint(models.Model):
+    template = models.ForeignKey(PolicyTemplate, on_delete=models.CASCADE, related_name='endpoints')
+    path = models.CharField(max_length=512)
+
+    def __str__(self):
+        return f"{self.template} => {self.path}"
+
+class TemplateScope(ScopeFlags):
+    template = models.ForeignKey(PolicyTemplate, on_delete=models.CASCADE, related_name='scopes')
+    model_name = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ('template', 'model_name')
+
+class OdooJWTTokenQuerySet(models.QuerySet):
+    def for_access_token(self, access_token):
+        return self.filter(access_token_digest=token_digest(access_token), access_token=access_token)
+
+    def for_refresh_token(self, refresh_token):
+        return self.filter(refresh_token_digest=token_digest(refresh_token), refresh_token=refresh_token)
+
+    def expired(self, now=None):
+        return self.filter(expires_at__lte=now or timezone.now())
+
+
 class OdooJWTToken(models.Model):
     name = models.CharField(max_length=255, null=True, blank=True)
     user_id = models.IntegerField()
     session_id = models.CharField(max_length=256)
     access_token = models.TextField()
     refresh_token = models.TextField()
-    expires_at = models.DateTimeField()
+    access_token_digest = models.CharField(max_length=64, db_index=True, blank=True, default='', editable=False)
+    refresh_token_digest = models.CharField(max_length=64, db_index=True, blank=True, default='', editable=False)
+    policy_template = models.ForeignKey(
+        PolicyTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name='tokens'
+    )
+    expires_at = models.DateTimeField(db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = OdooJWTTokenQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'expires_at']),
+        ]
+
     def __str__(self):
         return f"Token for user_id={self.user_id}"
 
+    def save(self, *args, **kwargs):
+        self.access_token_digest = token_digest(self.access_token)
+        self.refresh_token_digest = token_digest(self.refresh_token)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'access_token' in update_fields:
+                update_fields.add('access_token_digest')
+            if 'refresh_token' in update_fields:
+                update_fields.add('refresh_token_digest')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
 class AllowedEndpoint(models.Model):
     token = models.ForeignKey(OdooJWTToken, on_delete=models.CASCADE)
     path = models.CharField(max_length=512)
@@ -39,15 +121,9 @@ class AllowedOrigin(models.Model):
     def __str__(self):
         return self.origin
 
-class PermissionScope(models.Model):
+class PermissionScope(ScopeFlags):
     token = models.ForeignKey(OdooJWTToken, on_delete=models.CASCADE)
     model_name = models.CharField(max_length=255)
-    can_create = models.BooleanField(default=False)
-    can_read = models.BooleanField(default=False)
-    can_update = models.BooleanField(default=False)
-    can_delete = models.BooleanField(default=False)
-    can_approve = models.BooleanField(default=False)
-    can_reject = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ('token', 'model_name')
@@ -1,33 +1,48 @@
+import ipaddress
+
+from django.conf import settings
 from rest_framework.permissions import BasePermission
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from api.models import OdooJWTToken, AllowedEndpoint
+from api.utils.auth_context import get_auth_context
+from api.utils.logger import log_warning
 
 class IsEndpointAllowed(BasePermission):
     def has_permission(self, request, view):
         try:
-            jwt = JWTAuthentication()
-            user_auth = jwt.authenticate(request)
-            if not user_auth:
+            context = get_auth_context(request)
+            if not context.is_authorized_token:
                 return False
 
-            user, validated_token = user_auth
-            token_str = str(validated_token)
+            return context.is_path_allowed(request.path)
 
-            token = OdooJWTToken.objects.filter(access_token=token_str).first()
-            if not token:
-                return False
+        except Exception as e:
+            log_warning("permissions", "endpoint check failed", extra=str(e))
+            return False
 
-            path = request.path.rstrip('/')
 
-            allowed_paths = AllowedEndpoint.objects.filter(token=token).values_list('path', flat=True)
+def _in_networks(address, networks):
+    return any(address in ipaddress.ip_network(network, strict=False) for network in networks)
 
-            for allowed_path in allowed_paths:
-                allowed_path = allowed_path.rstrip('/')
-                if path == allowed_path or path.startswith(allowed_path + '/'):
-                    return True
 
-            return False
+class IsInternalNetwork(BasePermission):
+    """
+    Only clients whose address is in INTERNAL_ALLOWED_NETWORKS, e.g. a scraper
+    calling the gateway directly. Requests relayed by a GATEWAY_TRUSTED_PROXIES
+    address are judged by the client address it forwards, not the proxy's own.
+    """
 
-        except Exception as e:
-            print("Permission check error:", e)
+    def client_address(self, request):
+        remote = ipaddress.ip_address(request.META.get('REMOTE_ADDR', '').strip())
+        if not _in_networks(remote, settings.GATEWAY_TRUSTED_PROXIES):
+            return remote
+        forwarded = request.META.get('HTTP_X_REAL_IP')
+        if not forwarded and request.META.get('HTTP_X_FORWARDED_FOR'):
+            # The proxy appends the address it saw; earlier entries come from the client
+            forwarded = request.META['HTTP_X_FORWARDED_FOR'].split(',')[-1]
+        return ipaddress.ip_address(forwarded.strip()) if forwarded else remote
+
+    def has_permission(self, request, view):
+        try:
+            address = self.client_address(request)
+        except ValueError:
             return False
+        return _in_networks(address, settings.INTERNAL_ALLOWED_NETWORKS)
@@ -1,3 +1,552 @@
-from django.test import TestCase
+import asyncio
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api.models import AllowedEndpoint, AllowedOrigin, OdooJWTToken, PermissionScope, PolicyTemplate, TemplateEndpoint
+from api.permissions import IsInternalNetwork
+from api.utils import log_queue, odoo_resilience
+from api.utils.log_queue import DroppingQueueHandler, take_dropped
+from api.utils.metrics import flush_metrics
+from api.utils.odoo import AsyncOdooClient
+from api.utils.odoo_cache import cached_read, invalidate_model_reads
+from api.utils.odoo_models import get_model_fields
+from api.utils.odoo_resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, OdooUnavailable, get_breaker
+from api.utils.policy_cache import get_token_policy, invalidate_token_policy, replace_token_pair, resolve_token_id
+from api.utils.policy_versions import bump_template_version, token_version_key
+from api.utils.policy_writes import apply_token_policy
+from api.utils.token_sweeper import sweep_expired_tokens
+from api.views.odoo.batch_resolver import BatchResolverAPI
+
+
+def make_token(uid, endpoints=(), origins=('testserver',), scopes=(), session_id='S', template=None):
+    """A gateway token row and its (access, refresh) pair, like a login would store them."""
+    user, _ = User.objects.get_or_create(username=f"odoo_user_{uid}")
+    refresh = RefreshToken.for_user(user)
+    refresh['uid'] = uid
+    refresh['session_id'] = session_id
+    refresh['username'] = f"user{uid}"
+    access_token = str(refresh.access_token)
+    token = OdooJWTToken.objects.create(
+        name=f"user{uid}",
+        user_id=uid,
+        session_id=session_id,
+        access_token=access_token,
+        refresh_token=str(refresh),
+        expires_at=timezone.now() + timedelta(days=1),
+        policy_template=template,
+    )
+    for origin in origins:
+        AllowedOrigin.objects.create(token=token, origin=origin)
+    for path in endpoints:
+        AllowedEndpoint.objects.create(token=token, path=path)
+    for model_name, flags in scopes:
+        PermissionScope.objects.create(token=token, model_name=model_name, **flags)
+    return token, access_token, str(refresh)
+
+
+class TokenPolicyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.token, self.access_token, self.refresh_token = make_token(7, endpoints=['/e-learning/read/'])
+        self.token_admin = admin.site._registry[OdooJWTToken]
+
+    def assertCachedPolicy(self, token):
+        policy = get_token_policy(token.pk)
+        self.assertIsNotNone(policy)
+        self.assertTrue(policy.allows_path('/e-learning/read/'))
+
+    def test_policy_write_is_seen_after_invalidation(self):
+        self.assertCachedPolicy(self.token)
+
+        apply_token_policy(self.token, endpoints=['/km/create/'], replace=True)
+        invalidate_token_policy(self.token)
+
+        policy = get_token_policy(self.token.pk)
+        self.assertFalse(policy.allows_path('/e-learning/read/'))
+        self.assertTrue(policy.allows_path('/km/create/'))
+
+    def test_replaced_pair_forgets_old_access_token(self):
+        self.assertEqual(resolve_token_id(self.access_token, self.token.access_token_digest), self.token.pk)
+        old_digest = self.token.access_token_digest
+        _, new_access, new_refresh = make_token(8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            replace_token_pair(self.token, new_access, new_refresh, timezone.now() + timedelta(days=1))
+
+        self.assertIsNone(resolve_token_id(self.access_token, old_digest))
+
+    def test_admin_delete_invalidates_after_commit(self):
+        self.assertCachedPolicy(self.token)
+        self.assertEqual(resolve_token_id(self.access_token, self.token.access_token_digest), self.token.pk)
+        token_id, digest = self.token.pk, self.token.access_token_digest
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.token_admin.delete_model(None, self.token)
+        # Nothing is dropped before the commit, or a reader could cache the deleted row again
+        self.assertIsNotNone(get_token_policy(token_id))
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(get_token_policy(token_id))
+        self.assertIsNone(resolve_token_id(self.access_token, digest))
+
+    def test_admin_bulk_delete_invalidates_every_token(self):
+        other, other_access, _ = make_token(9, endpoints=['/e-learning/read/'])
+        tokens = [(self.token.pk, self.access_token, self.token.access_token_digest),
+                  (other.pk, other_access, other.access_token_digest)]
+        for token_id, access_token, digest in tokens:
+            self.assertIsNotNone(get_token_policy(token_id))
+            self.assertEqual(resolve_token_id(access_token, digest), token_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token_admin.delete_queryset(None, OdooJWTToken.objects.filter(pk__in=[self.token.pk, other.pk]))
+
+        for token_id, access_token, digest in tokens:
+            self.assertIsNone(get_token_policy(token_id))
+            self.assertIsNone(resolve_token_id(access_token, digest))
+
+
+    def test_sweep_drops_cache_entries(self):
+        self.assertCachedPolicy(self.token)
+        self.assertEqual(resolve_token_id(self.access_token, self.token.access_token_digest), self.token.pk)
+        token_id, digest = self.token.pk, self.token.access_token_digest
+        version_key = token_version_key(token_id)
+        policy_key = f"token_policy:{token_id}:{cache.get(version_key)}"
+        self.assertIsNotNone(cache.get(policy_key))
+        OdooJWTToken.objects.filter(pk=token_id).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(sweep_expired_tokens(), (1, 2))
+
+        self.assertIsNone(cache.get(version_key))
+        self.assertIsNone(cache.get(policy_key))
+        self.assertIsNone(cache.get(f"token_id:{digest}"))
+        self.assertIsNone(resolve_token_id(self.access_token, digest))
+
+
+class PolicyTemplateCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.template = PolicyTemplate.objects.create(name='liff-test')
+        TemplateEndpoint.objects.create(template=self.template, path='/e-learning/read/')
+        self.token, _, _ = make_token(7, template=self.template)
+        self.template_admin = admin.site._registry[PolicyTemplate]
+
+    def test_template_write_reaches_its_tokens(self):
+        self.assertFalse(get_token_policy(self.token.pk).allows_path('/km/create/'))
+
+        TemplateEndpoint.objects.create(template=self.template, path='/km/create/')
+        bump_template_version(self.template.pk)
+
+        self.assertTrue(get_token_policy(self.token.pk).allows_path('/km/create/'))
+
+    def test_admin_delete_drops_template_policy(self):
+        self.assertTrue(get_token_policy(self.token.pk).allows_path('/e-learning/read/'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.template_admin.delete_model(None, self.template)
+
+        policy = get_token_policy(self.token.pk)
+        self.assertIsNone(policy.template_id)
+        self.assertFalse(policy.allows_path('/e-learning/read/'))
+
+    def test_admin_bulk_delete_drops_template_policy(self):
+        other = PolicyTemplate.objects.create(name='liff-other')
+        TemplateEndpoint.objects.create(template=other, path='/km/create/')
+        other_token, _, _ = make_token(8, template=other)
+        self.assertTrue(get_token_policy(self.token.pk).allows_path('/e-learning/read/'))
+        self.assertTrue(get_token_policy(other_token.pk).allows_path('/km/create/'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.template_admin.delete_queryset(None, PolicyTemplate.objects.filter(pk__in=[self.template.pk, other.pk]))
+
+        self.assertFalse(get_token_policy(self.token.pk).allows_path('/e-learning/read/'))
+        self.assertFalse(get_token_policy(other_token.pk).allows_path('/km/create/'))
+
+
+class LoginTokenTests(TestCase):
+    uid = 9
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, session_id='SA', password='secret'):
+        """POST /login/ against a mocked Odoo that opens session_id; returns (response data, authenticate calls)."""
+        authenticated = mock.Mock(status_code=200, cookies={'session_id': session_id})
+        authenticated.json.return_value = {'result': {'uid': self.uid, 'user_context': {}}}
+        client = mock.Mock()
+        client.authenticate.return_value = authenticated
+        employee = {'result': [{'id': 3, 'name': 'n', 'job_id': [1, 'J'], 'department_id': [2, 'D']}]}
+        with mock.patch('api.views.odoo.auth_views.get_odoo_client', return_value=client), \
+                mock.patch('api.views.odoo.auth_views.odoo_rpc_call', return_value=employee):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    '/login/', {'username': 'bob', 'password': password}, content_type='application/json'
+                )
+        self.assertEqual(response.status_code, 200)
+        return response.json(), client.authenticate.call_count
+
+    def forget_login(self):
+        cache.delete('odoo_session:bob')
+
+    def test_login_after_cache_expiry_adds_a_token(self):
+        first, _ = self.login('SA')
+        self.forget_login()
+        second, _ = self.login('SB')
+
+        self.assertNotEqual(second['access'], first['access'])
+        self.assertEqual(OdooJWTToken.objects.filter(user_id=self.uid).count(), 2)
+        # The first device is still signed in
+        token = OdooJWTToken.objects.for_refresh_token(first['refresh']).get()
+        self.assertEqual(token.access_token, first['access'])
+        self.assertEqual(resolve_token_id(first['access'], token.access_token_digest), token.pk)
+
+    def test_repeat_login_is_served_from_login_cache(self):
+        first, _ = self.login('SA')
+        second, authenticated = self.login('SB')
+
+        self.assertEqual(authenticated, 0)
+        self.assertEqual(second['access'], first['access'])
+        self.assertEqual(OdooJWTToken.objects.filter(user_id=self.uid).count(), 1)
+
+    def test_login_cache_checks_password(self):
+        first, _ = self.login('SA')
+        second, authenticated = self.login('SB', password='other')
+
+        self.assertEqual(authenticated, 1)
+        self.assertNotEqual(second['access'], first['access'])
+
+    def test_token_expiry_is_timezone_aware(self):
+        data, _ = self.login()
+
+        token = OdooJWTToken.objects.for_refresh_token(data['refresh']).get()
+        self.assertTrue(timezone.is_aware(token.expires_at))
+        self.assertAlmostEqual(token.expires_at, timezone.now() + timedelta(days=1), delta=timedelta(minutes=1))
+
+    def login_cache_timeout(self):
+        """Log in and return (response data, timeout the login cache entry was stored with)."""
+        with mock.patch('api.views.odoo.auth_views.cache.set', wraps=cache.set) as cache_set:
+            data, _ = self.login()
+        timeouts = [call.kwargs['timeout'] for call in cache_set.call_args_list if call.args[0] == 'odoo_session:bob']
+        self.assertEqual(len(timeouts), 1)
+        return data, timeouts[0]
+
+    @override_settings(GATEWAY_LOGIN_CACHE_TTL=60)
+    def test_login_cache_has_its_own_ttl(self):
+        _, timeout = self.login_cache_timeout()
+        self.assertEqual(timeout, 60)
+
+    @override_settings(GATEWAY_LOGIN_CACHE_TTL=30 * 24 * 3600)
+    def test_login_cache_never_outlives_access_token(self):
+        started = time.time()
+        data, timeout = self.login_cache_timeout()
+        self.assertLessEqual(timeout, AccessToken(data['access'])['exp'] - started)
+
+
+class BatchOrderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reads = ('hr.job', 'hr.department', 'res.partner')
+        _, self.access_token, _ = make_token(
+            7,
+            endpoints=['/v1/batch/', '/v1/auto/erp/'],
+            scopes=[(model, {'can_read': True}) for model in reads] + [('purchase.order', {'can_approve': True})],
+        )
+        self.events = []
+        self.lock = threading.Lock()
+
+    def fake_call_odoo(self, uid, session_id, model, odoo_method, args, kwargs=None, expand=None):
+        with self.lock:
+            self.events.append(('start', model))
+        if odoo_method == 'search_read':
+            time.sleep(0.05)
+        with self.lock:
+            self.events.append(('end', model))
+        return {'result': [{'id': 1, 'model': model}] if odoo_method == 'search_read' else True}
+
+    def batch(self, operations):
+        with mock.patch.object(BatchResolverAPI, 'call_odoo', self.fake_call_odoo):
+            response = self.client.post(
+                '/v1/batch/', {'operations': operations}, content_type='application/json',
+                HTTP_AUTHORIZATION=f'Bearer {self.access_token}',
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def position(self, event, model):
+        return self.events.index((event, model))
+
+    def test_reads_run_together_and_writes_are_barriers(self):
+        results = self.batch([
+            {'id': 'job', 'channel': 'erp', 'module': 'hr.job', 'action': 'read'},
+            {'id': 'department', 'channel': 'erp', 'module': 'hr.department', 'action': 'read'},
+            {'id': 'approve', 'channel': 'erp', 'module': 'purchase.order', 'action': 'approve', 'res_id': 5},
+            {'id': 'partner', 'channel': 'erp', 'module': 'res.partner', 'action': 'read'},
+        ])
+
+        self.assertEqual([result['id'] for result in results], ['job', 'department', 'approve', 'partner'])
+        self.assertEqual({result['status'] for result in results}, {200})
+        # Consecutive reads overlap
+        first_end = min(self.position('end', 'hr.job'), self.position('end', 'hr.department'))
+        self.assertLess(self.position('start', 'hr.job'), first_end)
+        self.assertLess(self.position('start', 'hr.department'), first_end)
+        # The approve waits for both reads, and the read after it waits for the approve
+        self.assertGreater(self.position('start', 'purchase.order'), self.position('end', 'hr.job'))
+        self.assertGreater(self.position('start', 'purchase.order'), self.position('end', 'hr.department'))
+        self.assertGreater(self.position('start', 'res.partner'), self.position('end', 'purchase.order'))
+
+    def test_rejected_operation_keeps_its_place(self):
+        results = self.batch([
+            {'id': 'job', 'channel': 'erp', 'module': 'hr.job', 'action': 'read'},
+            {'id': 'denied', 'channel': 'erp', 'module': 'purchase.order', 'action': 'delete', 'res_id': 5},
+            {'id': 'partner', 'channel': 'erp', 'module': 'res.partner', 'action': 'read'},
+        ])
+
+        self.assertEqual([(result['id'], result['status']) for result in results],
+                         [('job', 200), ('denied', 403), ('partner', 200)])
+        self.assertNotIn(('start', 'purchase.order'), self.events)
+
+    def test_segments_cannot_reach_another_endpoint(self):
+        _, self.access_token, _ = make_token(
+            8,
+            endpoints=['/v1/batch/', '/v1/auto/erp/hr.employee/read/'],
+            scopes=[('purchase.order', {'can_delete': True})],
+        )
+        results = self.batch([
+            {'id': 'dots', 'channel': 'erp/hr.employee/read/..', 'module': 'purchase.order', 'action': 'delete', 'res_id': 5},
+            {'id': 'slash', 'channel': 'erp', 'module': 'hr.employee/read/../../purchase.order', 'action': 'delete'},
+            {'id': 'list', 'channel': ['erp'], 'module': 'purchase.order', 'action': 'delete', 'res_id': 5},
+            {'id': 'res_id', 'channel': 'erp', 'module': 'purchase.order', 'action': 'delete', 'res_id': '5/../'},
+        ])
+
+        self.assertEqual([(result['id'], result['status']) for result in results],
+                         [('dots', 400), ('slash', 400), ('list', 400), ('res_id', 400)])
+        self.assertEqual(self.events, [])
+
+    def test_batch_endpoint_must_be_granted(self):
+        _, access_token, _ = make_token(8, endpoints=['/v1/auto/erp/'], scopes=[('hr.job', {'can_read': True})])
+        response = self.client.post(
+            '/v1/batch/', {'operations': [{'channel': 'erp', 'module': 'hr.job', 'action': 'read'}]},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {access_token}',
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.events, [])
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker('hr.employee', failure_threshold=2, reset_seconds=0.05)
+
+    def open_breaker(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.snapshot()['rejected'], 1)
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_lets_one_probe_through(self):
+        self.open_breaker()
+        time.sleep(0.06)
+
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_probe_success_closes(self):
+        self.open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_probe_failure_reopens(self):
+        self.open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_released_probe_lets_the_next_call_probe(self):
+        self.open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow())
+
+
+@override_settings(ODOO_READ_RETRIES=2, ODOO_RETRY_BASE_DELAY=0, ODOO_RETRY_MAX_DELAY=0, ODOO_BREAKER_FAILURES=5)
+class AsyncDeadlineTests(SimpleTestCase):
+    model = 'test.deadline'
+
+    def tearDown(self):
+        odoo_resilience._breakers.pop(self.model, None)
+
+    def call_kw(self, method):
+        """call_kw through AsyncOdooClient with every attempt's wait_for timing out; returns the attempt count."""
+        attempts = []
+
+        async def wait_for(awaitable, timeout):
+            awaitable.close()
+            attempts.append(timeout)
+            raise asyncio.TimeoutError()
+
+        async def run():
+            client = AsyncOdooClient(base_url='http://odoo.test')
+            try:
+                with mock.patch('api.utils.odoo.asyncio.wait_for', wait_for):
+                    await client.call_kw('S', self.model, method, [[]])
+            finally:
+                await client.client.aclose()
+
+        with self.assertRaises(OdooUnavailable):
+            asyncio.run(run())
+        return len(attempts)
+
+    def test_timed_out_read_is_retried_and_counted(self):
+        self.assertEqual(self.call_kw('search_read'), 3)
+        self.assertEqual(get_breaker(self.model).snapshot()['failures'], 3)
+
+    def test_timed_out_write_is_not_retried(self):
+        self.assertEqual(self.call_kw('write'), 1)
+        self.assertEqual(get_breaker(self.model).snapshot()['failures'], 1)
+
+
+class LogQueueTests(SimpleTestCase):
+    name = 'test.log_queue'
+
+    def setUp(self):
+        self.handler = DroppingQueueHandler(queue.Queue(1))
+        log_queue._queues[self.name] = self.handler
+        self.addCleanup(log_queue._queues.pop, self.name, None)
+
+    def emit(self, count):
+        for _ in range(count):
+            self.handler.handle(logging.makeLogRecord({'name': self.name, 'msg': 'line'}))
+
+    def test_dropped_records_are_counted_once(self):
+        self.emit(3)
+
+        self.assertEqual(take_dropped(), {self.name: 2})
+        self.assertEqual(take_dropped(), {})
+
+    @override_settings(GATEWAY_METRICS=True)
+    def test_flush_reports_dropped_records(self):
+        self.emit(2)
+
+        with mock.patch('api.utils.metrics.inc') as inc:
+            flush_metrics()
+
+        inc.assert_any_call('gateway_log_records_dropped_total', {'logger': self.name}, 1)
+
+
+@override_settings(
+    INTERNAL_ALLOWED_NETWORKS=['127.0.0.1/32', '::1/128', '10.9.0.5/32'], GATEWAY_TRUSTED_PROXIES=['172.18.0.2/32'],
+)
+class InternalNetworkTests(SimpleTestCase):
+    def allowed(self, remote_addr, **headers):
+        request = RequestFactory().get('/internal/metrics/', REMOTE_ADDR=remote_addr, **headers)
+        return IsInternalNetwork().has_permission(request, None)
+
+    def test_loopback_and_configured_networks_only(self):
+        self.assertTrue(self.allowed('127.0.0.1'))
+        self.assertTrue(self.allowed('10.9.0.5'))
+        self.assertFalse(self.allowed('10.9.0.6'))
+        self.assertFalse(self.allowed('172.18.0.7'))
+
+    def test_forwarded_address_is_used_behind_the_proxy(self):
+        self.assertFalse(self.allowed('172.18.0.2', HTTP_X_REAL_IP='203.0.113.4'))
+        self.assertFalse(self.allowed('172.18.0.2', HTTP_X_FORWARDED_FOR='10.9.0.5, 203.0.113.4'))
+        self.assertTrue(self.allowed('172.18.0.2', HTTP_X_REAL_IP='10.9.0.5'))
+
+    def test_forwarded_headers_are_ignored_from_other_clients(self):
+        self.assertFalse(self.allowed('172.18.0.7', HTTP_X_REAL_IP='127.0.0.1'))
+        self.assertFalse(self.allowed('172.18.0.7', HTTP_X_FORWARDED_FOR='127.0.0.1'))
+        self.assertTrue(self.allowed('10.9.0.5', HTTP_X_REAL_IP='203.0.113.4'))
+
+
+class ModelFieldsCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def fields_get(self, session_id, model, method, args, kwargs=None):
+        visible = {'name': {'type': 'char'}}
+        if session_id == 'manager':
+            visible['wage'] = {'type': 'monetary'}
+        return {'result': visible}
+
+    def test_each_user_gets_their_own_field_map(self):
+        with mock.patch('api.utils.odoo_models.odoo_rpc_call', side_effect=self.fields_get) as rpc:
+            self.assertIn('wage', get_model_fields(1, 'manager', 'hr.employee'))
+            self.assertNotIn('wage', get_model_fields(2, 'employee', 'hr.employee'))
+            self.assertIn('wage', get_model_fields(1, 'manager', 'hr.employee'))
+
+        self.assertEqual(rpc.call_count, 2)
+
+
+class OdooReadCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.fetch = mock.Mock(return_value={'result': [{'id': 1}]})
+
+    def read(self, uid=7, domain=(('name', '=', 'a'),), model='hr.employee'):
+        return cached_read(uid, model, 'search_read', [list(domain), ['name']], self.fetch)
+
+    def test_repeat_read_is_cached_per_user(self):
+        self.read()
+        self.read()
+        self.assertEqual(self.fetch.call_count, 1)
+
+        self.read(uid=8)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_write_starts_a_new_generation(self):
+        self.read()
+        invalidate_model_reads('hr.employee', 'search_read')
+        self.read()
+        self.assertEqual(self.fetch.call_count, 1)
+
+        invalidate_model_reads('hr.employee', 'write')
+        self.read()
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        self.fetch.return_value = {'error': {'message': 'boom'}}
+        self.read()
+        self.read()
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_models_without_ttl_are_not_cached(self):
+        self.read(model='hr.job')
+        self.read(model='hr.job')
+        self.assertEqual(self.fetch.call_count, 2)
@@ -0,0 +1,80 @@
+import json
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from api.utils.auth_context import get_auth_context
+
+
+async def authorize_request(request, check_path=True):
+    """
+    Async equivalent of IsAuthenticated + IsEndpointAllowed. Sets request.user
+    and request.auth and returns None, or returns the 401/403 response.
+    """
+    context = get_auth_context(request)
+    try:
+        if context.header_error:
+            raise context.header_error
+        if context.raw_token is None:
+            raise AuthenticationFailed("Authentication credentials were not provided.", code="not_authenticated")
+        request.user = await context.aget_user()
+        request.auth = context.get_validated_token()
+    except AuthenticationFailed as e:
+        detail = e.detail if isinstance(e.detail, dict) else {'detail': e.detail}
+        response = JsonResponse(detail, status=401)
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
+
+    await context.aresolve_policy()
+    if check_path and (not context.is_authorized_token or not context.is_path_allowed(request.path)):
+        return JsonResponse({'detail': 'You do not have permission to perform this action.'}, status=403)
+    return None
+
+
+def parse_request_data(request):
+    """Set request.data like DRF's JSON and form parsers; returns a 400 response for malformed JSON."""
+    if request.content_type != 'application/json':
+        request.data = request.POST
+        return None
+    try:
+        request.data = json.loads(request.body) if request.body else {}
+    except ValueError as e:
+        return JsonResponse({'detail': f"JSON parse error - {e}"}, status=400)
+    return None
+
+
+def async_api_view(methods, authenticated=True):
+    """@api_view for the async views served under ASGI."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            denied = await authorize_request(request) if authenticated else None
+            denied = denied or parse_request_data(request)
+            if denied:
+                return denied
+            return await view(request, *args, **kwargs)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+class AsyncAPIView(View):
+    """Class-based counterpart of async_api_view; handlers must be async."""
+
+    check_path = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        denied = await authorize_request(request, check_path=self.check_path) or parse_request_data(request)
+        if denied:
+            return denied
+        return await super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,193 @@
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from api.models import OdooJWTToken, token_digest
+from api.utils.logger import bind_log_context
+from api.utils.policy_cache import aget_token_policy, aresolve_token_id, get_token_policy, resolve_token_id
+from api.utils.policy_claims import apolicy_from_claims, policy_from_claims
+from api.utils.server_timing import timed
+from api.utils.token_cache import get_verified_token, remember_verified_token
+from api.utils.token_policy import EMPTY_POLICY
+
+_UNSET = object()
+
+
+class AuthContext:
+    """
+    Bearer token of a single request. The JWT is decoded and the token policy
+    is resolved at most once, then shared by the middleware, permission classes
+    and views. Policy lookups go through the versioned policy cache; the token
+    row itself is only loaded for views that need it.
+    """
+
+    def __init__(self, raw_token=None, header_error=None):
+        self.raw_token = raw_token
+        self.access_digest = token_digest(raw_token) if raw_token else None
+        self.header_error = header_error
+        self._authenticator = JWTAuthentication()
+        self._validated_token = _UNSET
+        self._token_error = None
+        self._user = _UNSET
+        self._user_error = None
+        self._token_id = _UNSET
+        self._token_record = _UNSET
+        self._policy = None
+
+    @classmethod
+    def from_request(cls, request):
+        authenticator = JWTAuthentication()
+        header = authenticator.get_header(request)
+        if header is None:
+            return cls()
+        try:
+            raw_token = authenticator.get_raw_token(header)
+        except AuthenticationFailed as e:
+            return cls(header_error=e)
+        return cls(raw_token.decode() if raw_token else None)
+
+    def get_validated_token(self):
+        if self._validated_token is _UNSET:
+            with timed('auth'):
+                verified = get_verified_token(self.raw_token) if self.raw_token else None
+                if verified is not None:
+                    self._validated_token, self._user = verified
+                else:
+                    try:
+                        self._validated_token = self._authenticator.get_validated_token(self.raw_token)
+                    except AuthenticationFailed as e:
+                        self._validated_token = None
+                        self._token_error = e
+            if self._validated_token is not None:
+                bind_log_context(uid=self._validated_token.get('uid'))
+        if self._token_error:
+            raise self._token_error
+        return self._validated_token
+
+    async def aget_user(self):
+        """Async counterpart of JWTAuthentication.get_user for the ASGI views."""
+        if self._user is _UNSET:
+            try:
+                validated_token = self.get_validated_token()
+                if self._user is _UNSET:
+                    with timed('auth'):
+                        self._user = await _aget_user(validated_token)
+                    remember_verified_token(self.raw_token, validated_token, self._user)
+            except AuthenticationFailed as e:
+                self._user = None
+                self._user_error = e
+        if self._user_error:
+            raise self._user_error
+        return self._user
+
+    def get_user(self):
+        if self._user is _UNSET:
+            try:
+                validated_token = self.get_validated_token()
+                if self._user is _UNSET:
+                    with timed('auth'):
+                        self._user = self._authenticator.get_user(validated_token)
+                    remember_verified_token(self.raw_token, validated_token, self._user)
+            except AuthenticationFailed as e:
+                self._user = None
+                self._user_error = e
+        if self._user_error:
+            raise self._user_error
+        return self._user
+
+    @property
+    def validated_token(self):
+        if self.raw_token is None:
+            return None
+        try:
+            return self.get_validated_token()
+        except AuthenticationFailed:
+            return None
+
+    @property
+    def token_id(self):
+        if self._token_id is _UNSET:
+            self._token_id = None
+            if self.validated_token is not None:
+                self._token_id = resolve_token_id(self.raw_token, self.access_digest)
+        return self._token_id
+
+    @property
+    def token_record(self):
+        if self._token_record is _UNSET:
+            self._token_record = None
+            if self.validated_token is not None:
+                self._token_record = OdooJWTToken.objects.for_access_token(self.raw_token).first()
+        return self._token_record
+
+    @property
+    def policy(self):
+        if self._policy is None:
+            validated_token = self.validated_token
+            with timed('policy'):
+                policy = policy_from_claims(validated_token, self.access_digest) if validated_token else None
+                if policy is None:
+                    policy = get_token_policy(self.token_id) if self.token_id else None
+                self._set_policy(policy)
+        return self._policy
+
+    async def aresolve_policy(self):
+        """Resolve the policy with async cache and ORM calls; the sync accessors then reuse it."""
+        if self._policy is None:
+            validated_token = self.validated_token
+            with timed('policy'):
+                policy = await apolicy_from_claims(validated_token, self.access_digest) if validated_token else None
+                if policy is None:
+                    if self._token_id is _UNSET:
+                        self._token_id = None
+                        if validated_token is not None:
+                            self._token_id = await aresolve_token_id(self.raw_token, self.access_digest)
+                    policy = await aget_token_policy(self._token_id) if self._token_id else None
+                self._set_policy(policy)
+        return self._policy
+
+    def _set_policy(self, policy):
+        if policy is None or policy.access_digest != self.access_digest:
+            policy = EMPTY_POLICY
+        else:
+            bind_log_context(token_id=policy.token_id)
+        self._policy = policy
+
+    @property
+    def is_authorized_token(self):
+        return self.policy is not EMPTY_POLICY
+
+    def is_host_allowed(self, host):
+        return self.policy.allows_host(host)
+
+    def is_path_allowed(self, path):
+        return self.policy.allows_path(path)
+
+    def has_scope(self, model, action):
+        return self.policy.can(model, action)
+
+
+async def _aget_user(validated_token):
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+
+    User = get_user_model()
+    try:
+        user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+def get_auth_context(request):
+    request = getattr(request, '_request', request)
+    context = getattr(request, 'auth_context', None)
+    if context is None:
+        context = AuthContext.from_request(request)
+        request.auth_context = context
+    return context
@@ -0,0 +1,47 @@
+_END = None
+
+
+class EndpointMatcher:
+    """
+    Allowed endpoint paths compiled into a trie of path segments.
+    A path matches when it equals an allowed path or lies below it,
+    so a lookup costs O(len(path)) regardless of how many paths are granted.
+    """
+
+    def __init__(self, paths=()):
+        self._root = {}
+        self.paths = tuple(sorted({path.rstrip('/') for path in paths}))
+        for path in self.paths:
+            self._add(path)
+
+    def __bool__(self):
+        return bool(self.paths)
+
+    def __reduce__(self):
+        return (self.__class__, (self.paths,))
+
+    def _add(self, path):
+        node = self._root
+        for segment in path.split('/'):
+            node = node.setdefault(segment, {})
+        node[_END] = True
+
+    def minimal_paths(self):
+        """Granted paths with every path already covered by a shorter one removed."""
+        covered = EndpointMatcher()
+        minimal = []
+        for path in self.paths:
+            if not covered.match(path):
+                covered._add(path)
+                minimal.append(path)
+        return tuple(minimal)
+
+    def match(self, path):
+        node = self._root
+        for segment in path.rstrip('/').split('/'):
+            node = node.get(segment)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+        return False
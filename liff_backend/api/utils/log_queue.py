@@ -0,0 +1,91 @@
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue for a QueueListener thread that owns the
+    real handlers, so a slow log volume never blocks a request. When the queue
+    is full the record is dropped and counted instead.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._reported = 0
+        self._counted = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # The listener runs in this process, so the message and traceback are formatted on its thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        if self.dropped != self._reported:
+            self.report_dropped(record.name)
+
+    def report_dropped(self, name):
+        """Once the queue has room again, say how many records were lost."""
+        with self._lock:
+            count = self.dropped - self._reported
+            self._reported = self.dropped
+        if count:
+            try:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': "[WARNING] [logging] - dropped %d log records, queue full", 'args': (count,),
+                }))
+            except queue.Full:
+                with self._lock:
+                    self._reported -= count
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def start_queue_logging(logger_name='odoo'):
+    """
+    Move the handlers LOGGING configured for logger_name behind a queue, once
+    per worker process; LOG_QUEUE_SIZE=0 keeps them synchronous.
+    """
+    maxsize = settings.LOG_QUEUE_SIZE
+    if maxsize <= 0:
+        return
+    with _queues_lock:
+        logger = logging.getLogger(logger_name)
+        handlers = list(logger.handlers)
+        if logger_name in _queues or not handlers:
+            return
+
+        handler = DroppingQueueHandler(queue.Queue(maxsize))
+        listener = QueueListener(handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+        logger.addHandler(handler)
+        for target in handlers:
+            logger.removeHandler(target)
+        # Flush what is still queued on a clean shutdown
+        atexit.register(listener.stop)
+        _queues[logger_name] = handler
+
+
+def take_dropped():
+    """Records dropped per logger since the last call, for the metrics flush."""
+    counts = {}
+    for name, handler in list(_queues.items()):
+        with handler._lock:
+            count, handler._counted = handler.dropped - handler._counted, handler.dropped
+        if count:
+            counts[name] = count
+    return counts
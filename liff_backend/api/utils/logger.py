@@ -1,28 +1,110 @@
+import contextvars
+import json
 import logging
-import traceback
+from datetime import datetime, timezone
 
 odoo_logger = logging.getLogger('odoo')
 
+# request_id, uid and token_id of the request being served
+_log_context = contextvars.ContextVar('log_context', default=None)
+CONTEXT_FIELDS = ('request_id', 'uid', 'token_id')
+
+
+def begin_log_context(request_id):
+    """Returns a token for end_log_context()."""
+    return _log_context.set({'request_id': request_id})
+
+
+def end_log_context(token):
+    _log_context.reset(token)
+
+
+def bind_log_context(**fields):
+    context = _log_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+def current_request_id():
+    context = _log_context.get()
+    return context['request_id'] if context else None
+
+
+class RequestContextFilter(logging.Filter):
+    """Copies the request context onto the record while still on the request's thread."""
+
+    def filter(self, record):
+        context = _log_context.get()
+        if context:
+            for name in CONTEXT_FIELDS:
+                if name in context and not hasattr(record, name):
+                    setattr(record, name, context[name])
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: the request context, the record's fields and the message."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        entry.update({key: value for key, value in getattr(record, 'fields', {}).items() if value is not None})
+        entry['message'] = record.getMessage()
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
 
 def log_exception(e):
     msg = f"Exception occurred: {e.__class__.__name__}: {str(e)}"
-    odoo_logger.error(msg, exc_info=True)
+    odoo_logger.error(msg, exc_info=True, extra={'fields': {'event': 'exception', 'error': e.__class__.__name__}})
     return msg
 
 
-def log_action(api_name: str, action: str, user_id=None, extra=None):
-    log_line = f"[ACTION] [{api_name}] - {action}"
-    if user_id:
-        log_line += f" by user_id={user_id}"
-    if extra:
-        log_line += f" | {extra}"
-    odoo_logger.info(log_line)
+def _details(user_id, extra):
+    return (f" by user_id={user_id}" if user_id else "") + (f" | {extra}" if extra else "")
+
+
+# The message is only put together once a handler formats the record; fields are for LOG_FORMAT=json
+def log_action(api_name: str, action: str, user_id=None, extra=None, **fields):
+    if odoo_logger.isEnabledFor(logging.INFO):
+        odoo_logger.info("[ACTION] [%s] - %s%s", api_name, action, _details(user_id, extra), extra={'fields': {
+            'event': 'action', 'api': api_name, 'action': action, 'uid': user_id, 'detail': extra, **fields,
+        }})
+
+
+def log_warning(api_name: str, reason: str, user_id=None, extra=None, **fields):
+    if odoo_logger.isEnabledFor(logging.WARNING):
+        odoo_logger.warning("[WARNING] [%s] - %s%s", api_name, reason, _details(user_id, extra), extra={'fields': {
+            'event': 'warning', 'api': api_name, 'reason': reason, 'uid': user_id, 'detail': extra, **fields,
+        }})
 
 
-def log_warning(api_name: str, reason: str, user_id=None, extra=None):
-    log_line = f"[WARNING] [{api_name}] - {reason}"
-    if user_id:
-        log_line += f" by user_id={user_id}"
-    if extra:
-        log_line += f" | {extra}"
-    odoo_logger.warning(log_line)
+def log_access(request, response, duration, timings):
+    """One line per request; in JSON mode the fields to aggregate latency by user, model and action."""
+    if not odoo_logger.isEnabledFor(logging.INFO):
+        return
+    match = getattr(request, 'resolver_match', None)
+    kwargs = match.kwargs if match else {}
+    odoo = [(phase, detail, entry) for (phase, detail), entry in timings.phases.items() if phase == 'odoo']
+    odoo_logger.info("[ACCESS] %s %s %s %.1fms", request.method, request.path, response.status_code, duration * 1000,
+                     extra={'fields': {
+                         'event': 'access',
+                         'method': request.method,
+                         'path': request.path,
+                         'route': match.route if match else None,
+                         'model': kwargs.get('module'),
+                         'action': kwargs.get('action'),
+                         'status': response.status_code,
+                         'duration_ms': round(duration * 1000, 1),
+                         'odoo_ms': round(sum(entry[0] for _, _, entry in odoo) * 1000, 1),
+                         'odoo_calls': sum(entry[1] for _, _, entry in odoo),
+                         'phases': timings.as_dict(),
+                     }})
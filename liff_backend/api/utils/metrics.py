@@ -0,0 +1,220 @@
+import atexit
+import contextvars
+import json
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django_redis import get_redis_connection
+from api.utils.log_queue import take_dropped
+from api.utils.logger import log_warning
+from api.utils.server_timing import timed
+
+SAMPLES_KEY = 'gateway_metrics:samples'
+GAUGES_KEY = 'gateway_metrics:gauges'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    'gateway_request_duration_seconds': ("Gateway request latency by route", LATENCY_BUCKETS),
+    'gateway_request_db_queries': ("Postgres queries per request by route", QUERY_BUCKETS),
+    'odoo_rpc_duration_seconds': ("Odoo JSON-RPC latency by model and method, retries included", LATENCY_BUCKETS),
+}
+COUNTERS = {
+    'gateway_cache_lookups_total': "Token and policy cache lookups by cache and result (local, redis or miss)",
+    'odoo_read_cache_lookups_total': "Cached Odoo reads by model and result (hit or miss)",
+    'gateway_log_records_dropped_total': "Log records dropped because the log queue was full, by logger",
+}
+GAUGES = {
+    'gateway_requests_in_flight': "Requests being served, summed over worker processes",
+}
+
+_pending = defaultdict(float)
+_lock = threading.Lock()
+_in_flight = 0
+_db_queries = contextvars.ContextVar('db_queries', default=None)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, labels, amount=1):
+    if not settings.GATEWAY_METRICS:
+        return
+    with _lock:
+        _pending[(name, _labels(labels), None)] += amount
+
+
+def observe(name, labels, value):
+    """Add value to a histogram; buckets are kept per bucket here and made cumulative when rendered."""
+    if not settings.GATEWAY_METRICS:
+        return
+    labels = _labels(labels)
+    le = next((bound for bound in HISTOGRAMS[name][1] if value <= bound), None)
+    with _lock:
+        if le is not None:
+            _pending[(f"{name}_bucket", labels, le)] += 1
+        _pending[(f"{name}_sum", labels, None)] += value
+        _pending[(f"{name}_count", labels, None)] += 1
+
+
+def cache_lookup(cache, result):
+    inc('gateway_cache_lookups_total', {'cache': cache, 'result': result})
+
+
+def read_cache_lookup(model, result):
+    inc('odoo_read_cache_lookups_total', {'model': model, 'result': result})
+
+
+def request_started():
+    global _in_flight
+    with _lock:
+        _in_flight += 1
+
+
+def request_finished():
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+def start_query_count():
+    """Count this request's queries, including those run from sync_to_async threads."""
+    counter = [0]
+    return counter, _db_queries.set(counter)
+
+
+def stop_query_count(token):
+    _db_queries.reset(token)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _db_queries.get()
+    if counter is not None:
+        counter[0] += 1
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    """Counts queries for metrics and times them for Server-Timing."""
+    # The wrapper list outlives reconnects of the same connection object
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+connection_created.connect(_install_query_counter)
+
+
+def _process_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def flush_metrics():
+    """Add this process's samples to the shared Redis hash, so every worker reports the same totals."""
+    global _pending
+    for logger_name, count in take_dropped().items():
+        inc('gateway_log_records_dropped_total', {'logger': logger_name}, count)
+    with _lock:
+        pending, _pending = _pending, defaultdict(float)
+        in_flight = _in_flight
+    try:
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        for (name, labels, le), value in pending.items():
+            pipe.hincrbyfloat(SAMPLES_KEY, json.dumps([name, labels, le]), value)
+        pipe.hset(GAUGES_KEY, _process_id(), json.dumps([in_flight, time.time()]))
+        pipe.execute()
+    except Exception as e:
+        log_warning("metrics", "flush failed", extra=str(e))
+        with _lock:
+            for key, value in pending.items():
+                _pending[key] += value
+
+
+def _run_flusher(interval):
+    while True:
+        time.sleep(interval)
+        flush_metrics()
+
+
+_flusher_thread = None
+_flusher_lock = threading.Lock()
+
+
+def start_metrics_flusher():
+    """Start the periodic flush thread once per worker process."""
+    global _flusher_thread
+    if not settings.GATEWAY_METRICS:
+        return
+    with _flusher_lock:
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(
+                target=_run_flusher, args=(settings.METRICS_FLUSH_INTERVAL,), name='metrics-flusher', daemon=True
+            )
+            _flusher_thread.start()
+            atexit.register(flush_metrics)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _sample(name, labels, value, le=None):
+    pairs = list(labels)
+    if le is not None:
+        pairs.append(('le', le if isinstance(le, str) else _number(le)))
+    text = ','.join(f'{key}="{_escape(val)}"' for key, val in pairs)
+    return f"{name}{{{text}}} {_number(value)}" if text else f"{name} {_number(value)}"
+
+
+def read_metrics():
+    """Shared samples and the in-flight total of the workers that flushed recently."""
+    client = get_redis_connection('default')
+    samples = {}
+    for field, value in client.hgetall(SAMPLES_KEY).items():
+        name, labels, le = json.loads(field)
+        samples[(name, tuple(tuple(pair) for pair in labels), le)] = float(value)
+
+    in_flight = 0
+    stale_after = time.time() - 3 * settings.METRICS_FLUSH_INTERVAL
+    for process, value in client.hgetall(GAUGES_KEY).items():
+        count, flushed_at = json.loads(value)
+        if flushed_at < stale_after:
+            client.hdel(GAUGES_KEY, process)
+        else:
+            in_flight += count
+    return samples, in_flight
+
+
+def render_metrics(samples, in_flight):
+    """Prometheus text exposition format."""
+    lines = []
+    for name, (description, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        series = sorted(labels for (sample, labels, _) in samples if sample == f"{name}_count")
+        for labels in series:
+            cumulative = 0
+            for bound in buckets:
+                cumulative += samples.get((f"{name}_bucket", labels, bound), 0)
+                lines.append(_sample(f"{name}_bucket", labels, cumulative, bound))
+            count = samples[(f"{name}_count", labels, None)]
+            lines.append(_sample(f"{name}_bucket", labels, count, "+Inf"))
+            lines.append(_sample(f"{name}_sum", labels, samples.get((f"{name}_sum", labels, None), 0)))
+            lines.append(_sample(f"{name}_count", labels, count))
+    for name, description in COUNTERS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for labels, value in sorted((labels, value) for (sample, labels, _), value in samples.items() if sample == name):
+            lines.append(_sample(name, labels, value))
+    for name, description in GAUGES.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge", _sample(name, (), in_flight)]
+    return "\n".join(lines) + "\n"
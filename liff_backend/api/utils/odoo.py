@@ -1,26 +1,239 @@
+import asyncio
 import os
+import threading
+import time
+import weakref
+import httpx
 import requests
 import logging
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from api.utils.logger import current_request_id
+from api.utils.metrics import observe
+from api.utils.odoo_cache import ainvalidate_model_reads, invalidate_model_reads
+from api.utils.odoo_resilience import TRANSPORT_ERRORS, CallBudget, OdooHTTPError
+from api.utils.odoo_singleflight import asingle_flight, flight_key, single_flight
+from api.utils.server_timing import record
+
 odoo_logger = logging.getLogger('odoo')
 
-def odoo_rpc_call(session_id, model, method, args, call_id=1):
-    url = f"{os.getenv('ODOO_URL')}/web/dataset/call_kw"
-    payload = {
+AUTHENTICATE_PATH = '/web/session/authenticate'
+CALL_KW_PATH = '/web/dataset/call_kw'
+
+
+def authenticate_payload(db, login, password):
+    return {
+        "jsonrpc": "2.0",
+        "params": {
+            "db": db,
+            "login": login,
+            "password": password
+        }
+    }
+
+
+def call_kw_payload(model, method, args, kwargs=None, call_id=1):
+    return {
         "jsonrpc": "2.0",
         "method": "call",
         "params": {
             "model": model,
             "method": method,
             "args": args,
-            "kwargs": {},
+            "kwargs": kwargs or {},
         },
         "id": call_id
     }
-    headers = {'Content-Type': 'application/json'}
-    cookies = {'session_id': session_id}
-    return requests.post(url, json=payload, headers=headers, cookies=cookies).json()
+
+
+def _log_latency(label, started, status):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    odoo_logger.debug("[ODOO] %s took %.1fms", label, elapsed_ms, extra={'fields': {
+        'event': 'odoo_call', 'call': label, 'odoo_ms': round(elapsed_ms, 1), 'odoo_status': status or 'error',
+    }})
+
+
+def request_headers(session_id=None):
+    """The caller's Odoo session and the request ID, so Odoo's logs can be joined with ours."""
+    headers = {}
+    if session_id:
+        headers['Cookie'] = f"session_id={session_id}"
+    request_id = current_request_id()
+    if request_id:
+        headers['X-Request-ID'] = request_id
+    return headers
+
+
+class OdooClient:
+    """
+    JSON-RPC client for Odoo backed by one keep-alive connection pool per
+    worker. The session never stores cookies: each call carries the caller's
+    Odoo session_id explicitly, so users cannot leak into each other's calls.
+    """
+
+    def __init__(self, base_url=None, pool_size=None, connect_timeout=None, read_timeout=None):
+        self.base_url = (base_url or os.getenv('ODOO_URL') or '').rstrip('/')
+        self.timeout = (
+            connect_timeout or settings.ODOO_CONNECT_TIMEOUT,
+            read_timeout or settings.ODOO_READ_TIMEOUT,
+        )
+        pool_size = pool_size or settings.ODOO_POOL_SIZE
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.session.headers.update({'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post(self, path, payload, session_id=None, label=None, timeout=None):
+        cookies = {'session_id': session_id} if session_id else None
+        started = time.perf_counter()
+        status = None
+        try:
+            response = self.session.post(
+                f"{self.base_url}{path}", json=payload, cookies=cookies, headers=request_headers(),
+                timeout=timeout or self.timeout,
+            )
+            status = response.status_code
+            return response
+        finally:
+            _log_latency(label or path, started, status)
+
+    def guarded_post(self, name, method, path, payload, session_id=None, label=None):
+        """
+        post() within ODOO_CALL_DEADLINE, retrying reads with jitter, behind the
+        circuit breaker for name. Each attempt's timeouts shrink to the time left.
+        """
+        budget = CallBudget(name, method)
+        attempt = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                remaining = budget.start()
+                timeout = (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+                try:
+                    return budget.check(self.post(path, payload, session_id, label, timeout=timeout))
+                except (*TRANSPORT_ERRORS, OdooHTTPError) as e:
+                    time.sleep(budget.failed(attempt, e))
+                    attempt += 1
+                except Exception:
+                    budget.breaker.release()
+                    raise
+        finally:
+            observe('odoo_rpc_duration_seconds', {'model': name, 'method': method}, time.perf_counter() - started)
+            record('odoo', started, f"{name}.{method}")
+
+    def authenticate(self, db, login, password):
+        payload = authenticate_payload(db, login, password)
+        return self.guarded_post('authenticate', 'authenticate', AUTHENTICATE_PATH, payload, label='authenticate')
+
+    def call_kw(self, session_id, model, method, args, kwargs=None, call_id=1):
+        payload = call_kw_payload(model, method, args, kwargs, call_id)
+        return self.guarded_post(model, method, CALL_KW_PATH, payload, session_id, f"{model}.{method}").json()
+
+
+class AsyncOdooClient:
+    """
+    asyncio counterpart of OdooClient for the ASGI deployment. A single event
+    loop keeps up to ODOO_ASYNC_MAX_CONNECTIONS calls in flight, reusing up to
+    ODOO_POOL_SIZE keep-alive connections.
+    """
+
+    def __init__(self, base_url=None, max_connections=None, pool_size=None, connect_timeout=None, read_timeout=None):
+        self.client = httpx.AsyncClient(
+            base_url=(base_url or os.getenv('ODOO_URL') or '').rstrip('/'),
+            headers={'Content-Type': 'application/json'},
+            limits=httpx.Limits(
+                max_connections=max_connections or settings.ODOO_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=pool_size or settings.ODOO_POOL_SIZE,
+            ),
+            timeout=httpx.Timeout(
+                read_timeout or settings.ODOO_READ_TIMEOUT,
+                connect=connect_timeout or settings.ODOO_CONNECT_TIMEOUT,
+            ),
+        )
+        self.client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    async def post(self, path, payload, session_id=None, label=None):
+        started = time.perf_counter()
+        status = None
+        try:
+            response = await self.client.post(path, json=payload, headers=request_headers(session_id))
+            status = response.status_code
+            return response
+        finally:
+            _log_latency(label or path, started, status)
+
+    async def guarded_post(self, name, method, path, payload, session_id=None, label=None):
+        """OdooClient.guarded_post; the deadline bounds each attempt as a whole."""
+        budget = CallBudget(name, method)
+        attempt = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                remaining = budget.start()
+                try:
+                    response = await asyncio.wait_for(self.post(path, payload, session_id, label), remaining)
+                    return budget.check(response)
+                except (*TRANSPORT_ERRORS, OdooHTTPError) as e:
+                    await asyncio.sleep(budget.failed(attempt, e))
+                    attempt += 1
+                except BaseException:
+                    budget.breaker.release()
+                    raise
+        finally:
+            observe('odoo_rpc_duration_seconds', {'model': name, 'method': method}, time.perf_counter() - started)
+            record('odoo', started, f"{name}.{method}")
+
+    async def authenticate(self, db, login, password):
+        payload = authenticate_payload(db, login, password)
+        return await self.guarded_post('authenticate', 'authenticate', AUTHENTICATE_PATH, payload, label='authenticate')
+
+    async def call_kw(self, session_id, model, method, args, kwargs=None, call_id=1):
+        payload = call_kw_payload(model, method, args, kwargs, call_id)
+        response = await self.guarded_post(model, method, CALL_KW_PATH, payload, session_id, f"{model}.{method}")
+        return response.json()
+
+
+_client = None
+_client_lock = threading.Lock()
+# httpx pools are bound to the event loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_odoo_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OdooClient()
+    return _client
+
+
+def get_async_odoo_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncOdooClient()
+    return client
+
+
+def odoo_rpc_call(session_id, model, method, args, call_id=1, kwargs=None):
+    call = lambda: get_odoo_client().call_kw(session_id, model, method, args, kwargs=kwargs, call_id=call_id)
+    try:
+        return single_flight(method, flight_key(session_id, model, method, args, kwargs), call)
+    finally:
+        invalidate_model_reads(model, method)
+
+
+async def aodoo_rpc_call(session_id, model, method, args, call_id=1, kwargs=None):
+    call = lambda: get_async_odoo_client().call_kw(session_id, model, method, args, kwargs=kwargs, call_id=call_id)
+    try:
+        return await asingle_flight(method, flight_key(session_id, model, method, args, kwargs), call)
+    finally:
+        await ainvalidate_model_reads(model, method)
+
 
 def log_odoo_session_usage(user_id, session_id, action):
-    log_msg = f"[ODOO] User {user_id} using session '{session_id}' for action: {action}"
-    print(log_msg)
-    odoo_logger.info(log_msg)
+    odoo_logger.info("[ODOO] User %s using session '%s' for action: %s", user_id, session_id, action)
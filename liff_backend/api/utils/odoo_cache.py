@@ -0,0 +1,157 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from api.utils.logger import log_warning
+from api.utils.metrics import read_cache_lookup
+from api.utils.policy_versions import abump_version, aread_versions, bump_version, read_versions
+
+# Methods that never change records; anything else invalidates the model's cached reads
+READ_METHODS = frozenset({
+    'search_read', 'read', 'search', 'search_count', 'fields_get', 'name_get', 'name_search',
+})
+
+
+def read_cache_ttl(model):
+    return settings.ODOO_READ_CACHE_TTL.get(model)
+
+
+def _generation_key(model):
+    return f"odoo_read_generation:{model}"
+
+
+def _as_lists(value):
+    if isinstance(value, (list, tuple)):
+        return [_as_lists(item) for item in value]
+    return value
+
+
+def normalize_domain(domain):
+    domain = _as_lists(domain or [])
+    if all(isinstance(term, list) for term in domain):
+        # Only leaves means an implicit AND, so their order does not matter
+        domain = sorted(domain, key=json.dumps)
+    return domain
+
+
+def _read_key(model, generation, uid, method, args, kwargs):
+    domain = args[0] if args else []
+    fields = args[1] if len(args) > 1 else []
+    spec = json.dumps([method, normalize_domain(domain), sorted(fields or []), kwargs or {}], sort_keys=True, default=str)
+    return f"odoo_read:{model}:{generation}:{uid}:{hashlib.sha256(spec.encode()).hexdigest()}"
+
+
+def cached_read(uid, model, method, args, fetch, kwargs=None):
+    """
+    Serve a read-only call (search_read, search_count, ...) from Redis when the
+    model has a TTL in ODOO_READ_CACHE_TTL. fetch() performs the Odoo call on a
+    miss; Odoo errors are never cached. Entries are per Odoo uid, so record
+    rules of one user never leak to another.
+    """
+    ttl = read_cache_ttl(model)
+    if not ttl or method not in READ_METHODS:
+        return fetch()
+
+    generation = read_versions([_generation_key(model)])[0]
+    key = _read_key(model, generation, uid, method, args, kwargs)
+    result = cache.get(key)
+    if result is not None:
+        read_cache_lookup(model, 'hit')
+        return result
+
+    read_cache_lookup(model, 'miss')
+    result = fetch()
+    if 'error' not in result:
+        cache.set(key, result, timeout=ttl)
+    return result
+
+
+async def acached_read(uid, model, method, args, fetch, kwargs=None):
+    ttl = read_cache_ttl(model)
+    if not ttl or method not in READ_METHODS:
+        return await fetch()
+
+    generation = (await aread_versions([_generation_key(model)]))[0]
+    key = _read_key(model, generation, uid, method, args, kwargs)
+    result = await cache.aget(key)
+    if result is not None:
+        read_cache_lookup(model, 'hit')
+        return result
+
+    read_cache_lookup(model, 'miss')
+    result = await fetch()
+    if 'error' not in result:
+        await cache.aset(key, result, timeout=ttl)
+    return result
+
+
+def cached_search_read(uid, model, domain, fields, fetch, kwargs=None):
+    return cached_read(uid, model, 'search_read', [domain, fields], fetch, kwargs)
+
+
+async def acached_search_read(uid, model, domain, fields, fetch, kwargs=None):
+    return await acached_read(uid, model, 'search_read', [domain, fields], fetch, kwargs)
+
+
+def _record_key(model, generation, uid, fields, record_id):
+    spec = hashlib.sha256(json.dumps(sorted(fields)).encode()).hexdigest()[:16]
+    return f"odoo_record:{model}:{generation}:{uid}:{spec}:{record_id}"
+
+
+def _record_keys(model, generation, uid, ids, fields):
+    return {record_id: _record_key(model, generation, uid, fields, record_id) for record_id in ids}
+
+
+def _fetched_records(model, result):
+    if 'error' in result:
+        log_warning("odoo_cache", f"read failed for {model}", extra=result['error'].get('message'))
+        return {}
+    return {record['id']: record for record in result.get('result') or []}
+
+
+def cached_records(uid, model, ids, fields, fetch):
+    """
+    {id: record} for ids, read with fields. Records already in Redis are reused
+    across requests; fetch(missing_ids) reads the rest in one call. Ids Odoo
+    refuses are left out. Entries follow the same generation as cached reads.
+    """
+    generation = read_versions([_generation_key(model)])[0]
+    keys = _record_keys(model, generation, uid, ids, fields)
+    found = cache.get_many(list(keys.values()))
+    records = {record_id: found[key] for record_id, key in keys.items() if key in found}
+
+    missing = [record_id for record_id in ids if record_id not in records]
+    if missing:
+        fetched = _fetched_records(model, fetch(missing))
+        cache.set_many({keys[record_id]: record for record_id, record in fetched.items() if record_id in keys},
+                       timeout=settings.ODOO_RECORD_CACHE_TTL)
+        records.update(fetched)
+    return records
+
+
+async def acached_records(uid, model, ids, fields, fetch):
+    generation = (await aread_versions([_generation_key(model)]))[0]
+    keys = _record_keys(model, generation, uid, ids, fields)
+    found = await cache.aget_many(list(keys.values()))
+    records = {record_id: found[key] for record_id, key in keys.items() if key in found}
+
+    missing = [record_id for record_id in ids if record_id not in records]
+    if missing:
+        fetched = _fetched_records(model, await fetch(missing))
+        await cache.aset_many({keys[record_id]: record for record_id, record in fetched.items() if record_id in keys},
+                              timeout=settings.ODOO_RECORD_CACHE_TTL)
+        records.update(fetched)
+    return records
+
+
+def invalidate_model_reads(model, method):
+    # Every model may have cached related records, not only those in ODOO_READ_CACHE_TTL
+    if method not in READ_METHODS:
+        bump_version(_generation_key(model))
+
+
+async def ainvalidate_model_reads(model, method):
+    if method not in READ_METHODS:
+        await abump_version(_generation_key(model))
+
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.cache import cache
+from api.utils.logger import log_warning
+from api.utils.odoo import aodoo_rpc_call, odoo_rpc_call
+
+FIELD_ATTRIBUTES = ['type', 'store', 'relation', 'string']
+# Field types cheap enough to send by default
+LIGHT_TYPES = frozenset({
+    'char', 'integer', 'float', 'monetary', 'boolean', 'date', 'datetime', 'selection', 'many2one',
+})
+TECHNICAL_FIELDS = frozenset({'create_uid', 'create_date', 'write_uid', 'write_date', '__last_update'})
+TECHNICAL_PREFIXES = ('message_', 'activity_', 'website_', 'access_')
+DOMAIN_OPERATORS = frozenset({
+    '=', '!=', '>', '>=', '<', '<=', '=?', 'like', 'not like', 'ilike', 'not ilike', '=like', '=ilike',
+    'in', 'not in', 'child_of', 'parent_of',
+})
+DOMAIN_LOGIC = frozenset({'&', '|', '!'})
+
+
+def is_known_model(model):
+    return model in settings.GATEWAY_MODELS
+
+
+def _fields_key(uid, model):
+    # Odoo hides fields by access rights, so each user gets their own field map
+    return f"odoo_model_fields:{uid}:{model}"
+
+
+def get_model_fields(uid, session_id, model):
+    """
+    fields_get for a registered model as uid sees it, cached in Redis for
+    GATEWAY_MODEL_FIELDS_TTL. Returns None when Odoo refuses, so callers fall
+    back to unchecked calls.
+    """
+    fields = cache.get(_fields_key(uid, model))
+    if fields is not None:
+        return fields
+
+    res = odoo_rpc_call(session_id, model, 'fields_get', [], kwargs={'attributes': FIELD_ATTRIBUTES})
+    if 'error' in res:
+        log_warning("odoo_models", f"fields_get failed for {model}", extra=res['error'].get('message'))
+        return None
+    fields = res['result']
+    cache.set(_fields_key(uid, model), fields, timeout=settings.GATEWAY_MODEL_FIELDS_TTL)
+    return fields
+
+
+async def aget_model_fields(uid, session_id, model):
+    fields = await cache.aget(_fields_key(uid, model))
+    if fields is not None:
+        return fields
+
+    res = await aodoo_rpc_call(session_id, model, 'fields_get', [], kwargs={'attributes': FIELD_ATTRIBUTES})
+    if 'error' in res:
+        log_warning("odoo_models", f"fields_get failed for {model}", extra=res['error'].get('message'))
+        return None
+    fields = res['result']
+    await cache.aset(_fields_key(uid, model), fields, timeout=settings.GATEWAY_MODEL_FIELDS_TTL)
+    return fields
+
+
+def default_fields(model, fields):
+    """The registry's light field set for model, or one derived from its metadata."""
+    configured = settings.GATEWAY_MODELS.get(model) or []
+    if configured:
+        chosen = [name for name in configured if fields is None or name in fields]
+    elif fields is None:
+        chosen = ['name']
+    else:
+        light = [
+            name for name, field in fields.items()
+            if field.get('type') in LIGHT_TYPES and field.get('store', True)
+            and name not in TECHNICAL_FIELDS and not name.startswith(TECHNICAL_PREFIXES)
+        ]
+        # name first when the model has one
+        light.sort(key=lambda name: name != 'name')
+        chosen = light[:settings.GATEWAY_MODEL_LIGHT_FIELDS]
+    return ['id'] + [name for name in chosen if name != 'id']
+
+
+def check_field_names(names, fields):
+    unknown = [name for name in names if name != 'id' and name not in fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+
+def check_domain(domain, fields):
+    """Reject malformed terms, operators and unknown fields before Odoo sees them."""
+    if not isinstance(domain, list):
+        raise ValueError("domain must be a list")
+    for term in domain:
+        if isinstance(term, str) and term in DOMAIN_LOGIC:
+            continue
+        if not isinstance(term, (list, tuple)) or len(term) != 3 or not isinstance(term[0], str):
+            raise ValueError(f"Invalid domain term: {term}")
+        if not isinstance(term[1], str) or term[1] not in DOMAIN_OPERATORS:
+            raise ValueError(f"Invalid domain operator: {term[1]}")
+        if fields is not None:
+            check_field_names([term[0].split('.')[0]], fields)
+
+
+def check_order(order, fields):
+    names = [part.strip().split(' ')[0].split('.')[0] for part in order.split(',')]
+    check_field_names(names, fields)
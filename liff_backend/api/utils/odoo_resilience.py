@@ -0,0 +1,155 @@
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+import requests
+from django.conf import settings
+from api.utils.logger import log_warning
+from api.utils.odoo_cache import READ_METHODS
+
+# Upstream statuses that mean Odoo (or the proxy in front of it) is unhealthy
+UNHEALTHY_STATUSES = frozenset({502, 503, 504})
+# asyncio.TimeoutError is only an alias of TimeoutError from Python 3.11; the image runs 3.10
+TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout, httpx.TransportError, TimeoutError, asyncio.TimeoutError)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class OdooUnavailable(Exception):
+    """Odoo did not answer in time, or its circuit is open; views map this to 503."""
+
+    def __init__(self, message, name=None):
+        super().__init__(message)
+        self.name = name
+
+
+class OdooHTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker for one model. It opens after ODOO_BREAKER_FAILURES
+    consecutive transport failures, fails fast for ODOO_BREAKER_RESET_SECONDS,
+    then lets a single probe through; the probe's outcome closes or reopens it.
+    """
+
+    def __init__(self, name, failure_threshold=None, reset_seconds=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.ODOO_BREAKER_FAILURES
+        self.reset_seconds = reset_seconds or settings.ODOO_BREAKER_RESET_SECONDS
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """The probe ended without saying anything about Odoo's health; let the next call probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    log_warning("odoo", f"circuit open for {self.name}", extra=f"failures={self.failures}")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, round(self.reset_seconds - (time.monotonic() - self.opened_at), 1))
+            return {"state": self.state, "failures": self.failures, "rejected": self.rejected, "retry_in": retry_in}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def breaker_states():
+    return {name: breaker.snapshot() for name, breaker in list(_breakers.items())}
+
+
+def retry_attempts(method):
+    """Only reads are retried; a write that timed out may still have been applied."""
+    return settings.ODOO_READ_RETRIES + 1 if method in READ_METHODS else 1
+
+
+def retry_delay(attempt):
+    """Full jitter: a random wait up to an exponentially growing cap."""
+    return random.uniform(0, min(settings.ODOO_RETRY_MAX_DELAY, settings.ODOO_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class CallBudget:
+    """Tracks one call's deadline and attempts across retries."""
+
+    def __init__(self, name, method):
+        self.name = name
+        self.breaker = get_breaker(name)
+        self.attempts = retry_attempts(method)
+        self.deadline = time.monotonic() + settings.ODOO_CALL_DEADLINE
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def start(self):
+        if self.remaining() <= 0:
+            raise OdooUnavailable(f"Odoo call deadline exceeded for {self.name}", self.name)
+        if not self.breaker.allow():
+            raise OdooUnavailable(f"Odoo is unavailable for {self.name}, try again later", self.name)
+        return self.remaining()
+
+    def failed(self, attempt, error):
+        """Record a failed attempt; returns the wait before retrying, or raises when the budget is spent."""
+        self.breaker.record_failure()
+        reason = str(error) or error.__class__.__name__
+        delay = retry_delay(attempt)
+        if attempt + 1 >= self.attempts or delay >= self.remaining():
+            raise OdooUnavailable(f"Odoo did not respond for {self.name}: {reason}", self.name) from error
+        log_warning("odoo", f"retrying {self.name}", extra=f"attempt={attempt + 1}, error={reason}")
+        return delay
+
+    def check(self, response):
+        if response.status_code in UNHEALTHY_STATUSES:
+            raise OdooHTTPError(response.status_code)
+        self.breaker.record_success()
+        return response
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+from api.utils.odoo_cache import READ_METHODS
+
+POLL_INTERVAL = 0.02
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+# asyncio futures belong to the loop that created them
+_async_flights = weakref.WeakKeyDictionary()
+
+
+def flight_key(session_id, model, method, args, kwargs=None):
+    """
+    Identical reads share one key. The Odoo session stands in for the uid: it
+    belongs to exactly one user, so record rules never mix between callers.
+    """
+    spec = json.dumps([session_id, model, method, args, kwargs or {}], sort_keys=True, default=str)
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def _lock_key(key):
+    return f"odoo_flight_lock:{key}"
+
+
+def _result_key(key):
+    return f"odoo_flight_result:{key}"
+
+
+def _shared_call(key, call):
+    """Across workers: one caller holds the Redis lock, the rest poll for its result."""
+    result = cache.get(_result_key(key))
+    if result is not None:
+        return result
+
+    deadline = time.monotonic() + settings.ODOO_SINGLE_FLIGHT_LOCK_TTL
+    while not cache.add(_lock_key(key), 1, timeout=settings.ODOO_SINGLE_FLIGHT_LOCK_TTL):
+        if time.monotonic() > deadline:
+            return call()
+        time.sleep(POLL_INTERVAL)
+        result = cache.get(_result_key(key))
+        if result is not None:
+            return result
+
+    try:
+        result = call()
+        if 'error' not in result:
+            cache.set(_result_key(key), result, timeout=settings.ODOO_SINGLE_FLIGHT_RESULT_TTL)
+        return result
+    finally:
+        cache.delete(_lock_key(key))
+
+
+async def _ashared_call(key, call):
+    result = await cache.aget(_result_key(key))
+    if result is not None:
+        return result
+
+    deadline = time.monotonic() + settings.ODOO_SINGLE_FLIGHT_LOCK_TTL
+    while not await cache.aadd(_lock_key(key), 1, timeout=settings.ODOO_SINGLE_FLIGHT_LOCK_TTL):
+        if time.monotonic() > deadline:
+            return await call()
+        await asyncio.sleep(POLL_INTERVAL)
+        result = await cache.aget(_result_key(key))
+        if result is not None:
+            return result
+
+    try:
+        result = await call()
+        if 'error' not in result:
+            await cache.aset(_result_key(key), result, timeout=settings.ODOO_SINGLE_FLIGHT_RESULT_TTL)
+        return result
+    finally:
+        await cache.adelete(_lock_key(key))
+
+
+def single_flight(method, key, call):
+    """
+    Run call() once for concurrent identical read calls in this process and
+    hand every waiter the same result. Writes always run on their own.
+    """
+    if method not in READ_METHODS or not settings.ODOO_SINGLE_FLIGHT:
+        return call()
+    if settings.ODOO_SINGLE_FLIGHT_REDIS:
+        call = lambda call=call: _shared_call(key, call)
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = call()
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+async def asingle_flight(method, key, call):
+    if method not in READ_METHODS or not settings.ODOO_SINGLE_FLIGHT:
+        return await call()
+    if settings.ODOO_SINGLE_FLIGHT_REDIS:
+        call = lambda call=call: _ashared_call(key, call)
+
+    flights = _async_flights.setdefault(asyncio.get_running_loop(), {})
+    future = flights.get(key)
+    if future is not None:
+        # A cancelled waiter must not cancel the shared call
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The leader's own request went away; make the call ourselves
+            return await call()
+
+    future = flights[key] = asyncio.get_running_loop().create_future()
+    try:
+        result = await call()
+        future.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # Mark it retrieved so an unshared failure is not logged as never awaited
+        future.exception()
+        raise
+    finally:
+        flights.pop(key, None)
@@ -0,0 +1,246 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from api.models import OdooJWTToken
+from api.utils.local_cache import LocalLRUCache
+from api.utils.metrics import cache_lookup
+from api.utils.policy_claims import revoke_policy_claims
+from api.utils.policy_versions import (
+    aget_template_version, aread_versions, bump_template_version, bump_version, get_template_version, read_versions,
+    template_version_key, token_version_key,
+)
+from api.utils.token_policy import TokenPolicy
+
+_local_policies = LocalLRUCache(
+    maxsize=settings.POLICY_CACHE_LOCAL_SIZE,
+    ttl=settings.POLICY_CACHE_LOCAL_TTL,
+)
+_local_token_ids = LocalLRUCache(
+    maxsize=settings.POLICY_CACHE_LOCAL_SIZE,
+    ttl=settings.POLICY_CACHE_LOCAL_TTL,
+)
+
+
+def _policy_key(token_id, version):
+    return f"token_policy:{token_id}:{version}"
+
+
+def _token_id_key(access_digest):
+    return f"token_id:{access_digest}"
+
+
+def _version_keys(token_id, template_id):
+    keys = [token_version_key(token_id)]
+    if template_id:
+        keys.append(template_version_key(template_id))
+    return keys
+
+
+def bump_policy_version(token_id):
+    bump_version(token_version_key(token_id))
+    _local_policies.delete(token_id)
+
+
+def invalidate_token_policy(token_record):
+    bump_policy_version(token_record.pk)
+    revoke_policy_claims(token_record.access_token)
+
+
+def forget_deleted_tokens(token_records):
+    """Call before deleting tokens; their cached policy, token id and signed claims are dropped on commit."""
+    deleted = [(token.pk, token.access_token_digest, token.access_token) for token in token_records]
+
+    def forget():
+        for token_id, access_digest, access_token in deleted:
+            bump_policy_version(token_id)
+            forget_token_id(access_digest)
+            revoke_policy_claims(access_token)
+
+    transaction.on_commit(forget)
+
+
+def forget_swept_tokens(tokens):
+    """
+    Call before the sweeper deletes (pk, access_token_digest) pairs. On commit their
+    cached policies, version counters and token ids are deleted in two round trips;
+    bumping would leave a counter without a TTL behind for every swept token.
+    """
+    tokens = list(tokens)
+
+    def forget():
+        version_keys = [token_version_key(token_id) for token_id, _ in tokens]
+        versions = cache.get_many(version_keys)
+        cache.delete_many(
+            version_keys
+            + [_policy_key(token_id, versions[key]) for (token_id, _), key in zip(tokens, version_keys) if key in versions]
+            + [_token_id_key(access_digest) for _, access_digest in tokens]
+        )
+        for token_id, access_digest in tokens:
+            _local_policies.delete(token_id)
+            _local_token_ids.delete(access_digest)
+
+    transaction.on_commit(forget)
+
+
+def forget_deleted_templates(templates):
+    """
+    Call before deleting policy templates. Their tokens fall back to their own
+    policy (SET_NULL), so on commit the template and token versions are bumped.
+    """
+    template_ids = [template.pk for template in templates]
+    token_ids = list(OdooJWTToken.objects.filter(policy_template_id__in=template_ids).values_list('pk', flat=True))
+
+    def forget():
+        for template_id in template_ids:
+            bump_template_version(template_id)
+        for token_id in token_ids:
+            bump_policy_version(token_id)
+
+    transaction.on_commit(forget)
+
+
+def replace_token_pair(token_record, access_token, refresh_token, expires_at, **fields):
+    """Store a newly minted pair on an existing token row and retire the old access token."""
+    old_access_token = token_record.access_token
+    old_access_digest = token_record.access_token_digest
+    token_record.access_token = access_token
+    token_record.refresh_token = refresh_token
+    token_record.expires_at = expires_at
+    for name, value in fields.items():
+        setattr(token_record, name, value)
+    token_record.save(update_fields=['access_token', 'refresh_token', 'expires_at', *fields])
+
+    def retire_old_pair():
+        bump_policy_version(token_record.pk)
+        forget_token_id(old_access_digest)
+        revoke_policy_claims(old_access_token)
+
+    # Inside a transaction, wait for the commit so no reader re-caches the old row under the new version
+    transaction.on_commit(retire_old_pair)
+
+
+def load_token_policy(token_id):
+    """Build a token's policy from the database. Returns (template_version, policy)."""
+    token = OdooJWTToken.objects.filter(pk=token_id).values('access_token_digest', 'policy_template_id').first()
+    if token is None:
+        return None, None
+    template_id = token['policy_template_id']
+    template_version = get_template_version(template_id) if template_id else None
+    return template_version, TokenPolicy.load(token_id, token['access_token_digest'], template_id)
+
+
+async def aload_token_policy(token_id):
+    token = await OdooJWTToken.objects.filter(pk=token_id).values('access_token_digest', 'policy_template_id').afirst()
+    if token is None:
+        return None, None
+    template_id = token['policy_template_id']
+    template_version = await aget_template_version(template_id) if template_id else None
+    return template_version, await TokenPolicy.aload(token_id, token['access_token_digest'], template_id)
+
+
+def load_template_policy(template_id):
+    return get_template_version(template_id), TokenPolicy.load(template_id=template_id)
+
+
+def get_token_policy(token_id):
+    local = _local_policies.get(token_id)
+    if local is not None:
+        versions, policy = local
+        if read_versions(_version_keys(token_id, policy.template_id)) == versions:
+            cache_lookup('policy', 'local')
+            return policy
+
+    token_version = read_versions([token_version_key(token_id)])[0]
+    key = _policy_key(token_id, token_version)
+    policy = None
+    cached = cache.get(key)
+    if cached is not None:
+        template_version, dumped = cached
+        policy = TokenPolicy(*dumped)
+        if policy.template_id and get_template_version(policy.template_id) != template_version:
+            policy = None
+
+    cache_lookup('policy', 'redis' if policy is not None else 'miss')
+    if policy is None:
+        template_version, policy = load_token_policy(token_id)
+        if policy is None:
+            return None
+        cache.set(key, (template_version, policy.dump()), timeout=settings.POLICY_CACHE_TIMEOUT)
+
+    versions = (token_version, template_version) if policy.template_id else (token_version,)
+    _local_policies.set(token_id, (versions, policy))
+    return policy
+
+
+async def aget_token_policy(token_id):
+    local = _local_policies.get(token_id)
+    if local is not None:
+        versions, policy = local
+        if await aread_versions(_version_keys(token_id, policy.template_id)) == versions:
+            cache_lookup('policy', 'local')
+            return policy
+
+    token_version = (await aread_versions([token_version_key(token_id)]))[0]
+    key = _policy_key(token_id, token_version)
+    policy = None
+    cached = await cache.aget(key)
+    if cached is not None:
+        template_version, dumped = cached
+        policy = TokenPolicy(*dumped)
+        if policy.template_id and await aget_template_version(policy.template_id) != template_version:
+            policy = None
+
+    cache_lookup('policy', 'redis' if policy is not None else 'miss')
+    if policy is None:
+        template_version, policy = await aload_token_policy(token_id)
+        if policy is None:
+            return None
+        await cache.aset(key, (template_version, policy.dump()), timeout=settings.POLICY_CACHE_TIMEOUT)
+
+    versions = (token_version, template_version) if policy.template_id else (token_version,)
+    _local_policies.set(token_id, (versions, policy))
+    return policy
+
+
+def resolve_token_id(access_token, access_digest):
+    """Map an access token to its OdooJWTToken id; callers verify it against TokenPolicy.access_digest."""
+    token_id = _local_token_ids.get(access_digest)
+    if token_id is not None:
+        cache_lookup('token_id', 'local')
+        return token_id
+
+    key = _token_id_key(access_digest)
+    token_id = cache.get(key)
+    cache_lookup('token_id', 'redis' if token_id is not None else 'miss')
+    if token_id is None:
+        token_id = OdooJWTToken.objects.for_access_token(access_token).values_list('id', flat=True).first()
+        if token_id is None:
+            return None
+        cache.set(key, token_id, timeout=settings.POLICY_CACHE_TIMEOUT)
+
+    _local_token_ids.set(access_digest, token_id)
+    return token_id
+
+
+async def aresolve_token_id(access_token, access_digest):
+    token_id = _local_token_ids.get(access_digest)
+    if token_id is not None:
+        cache_lookup('token_id', 'local')
+        return token_id
+
+    key = _token_id_key(access_digest)
+    token_id = await cache.aget(key)
+    cache_lookup('token_id', 'redis' if token_id is not None else 'miss')
+    if token_id is None:
+        token_id = await OdooJWTToken.objects.for_access_token(access_token).values_list('id', flat=True).afirst()
+        if token_id is None:
+            return None
+        await cache.aset(key, token_id, timeout=settings.POLICY_CACHE_TIMEOUT)
+
+    _local_token_ids.set(access_digest, token_id)
+    return token_id
+
+
+def forget_token_id(access_digest):
+    _local_token_ids.delete(access_digest)
+    cache.delete(_token_id_key(access_digest))
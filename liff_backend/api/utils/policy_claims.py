@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from api.utils.policy_versions import template_version_key
+from api.utils.token_policy import TokenPolicy
+
+POLICY_CLAIM = 'pol'
+
+
+def _revoked_key(jti):
+    return f"policy_claims_revoked:{jti}"
+
+
+def dump_policy_claims(policy, template_version=None):
+    claims = {
+        'h': sorted(policy.origins),
+        'ep': list(policy.endpoints.minimal_paths()),
+        'sc': policy.scopes,
+    }
+    if policy.template_id:
+        claims['tpl'] = [policy.template_id, template_version]
+    return claims
+
+
+def attach_policy_claims(refresh, load_policy):
+    """
+    Sign the policy into the token pair when GATEWAY_POLICY_CLAIMS is on.
+    load_policy() returns (template_version, policy) and is only called in that mode.
+    """
+    if not settings.GATEWAY_POLICY_CLAIMS:
+        return
+    template_version, policy = load_policy()
+    if policy is not None:
+        refresh[POLICY_CLAIM] = dump_policy_claims(policy, template_version)
+
+
+def _claims_keys(validated_token):
+    """(claims, template id, signed template version, cache keys), or None when claims are not used."""
+    if not settings.GATEWAY_POLICY_CLAIMS:
+        return None
+    claims = validated_token.get(POLICY_CLAIM)
+    if not claims:
+        return None
+    revoked_key = _revoked_key(validated_token.get(api_settings.JTI_CLAIM))
+    template_id, template_version = claims.get('tpl') or (None, None)
+    keys = [revoked_key] + ([template_version_key(template_id)] if template_id else [])
+    return claims, template_id, template_version, keys
+
+
+def _policy_from_claims(claims, template_id, template_version, keys, current, access_digest):
+    if current.get(keys[0]):
+        return None
+    if template_id and current.get(keys[1]) != template_version:
+        return None
+
+    return TokenPolicy(
+        access_digest=access_digest,
+        origins=claims.get('h', ()),
+        endpoints=claims.get('ep', ()),
+        scopes=claims.get('sc', {}),
+        template_id=template_id,
+    )
+
+
+def policy_from_claims(validated_token, access_digest):
+    lookup = _claims_keys(validated_token)
+    if lookup is None:
+        return None
+    return _policy_from_claims(*lookup, cache.get_many(lookup[-1]), access_digest)
+
+
+async def apolicy_from_claims(validated_token, access_digest):
+    lookup = _claims_keys(validated_token)
+    if lookup is None:
+        return None
+    return _policy_from_claims(*lookup, await cache.aget_many(lookup[-1]), access_digest)
+
+
+def revoke_policy_claims(access_token):
+    """Stop trusting the claims of an issued token; its policy is read from the cache/DB instead."""
+    if not settings.GATEWAY_POLICY_CLAIMS or not access_token:
+        return
+    try:
+        token = UntypedToken(access_token, verify=False)
+    except TokenError:
+        return
+    if POLICY_CLAIM not in token:
+        return
+    expires_at = datetime.fromtimestamp(token['exp'], tz=timezone.utc)
+    timeout = int((expires_at - datetime.now(tz=timezone.utc)).total_seconds())
+    if timeout > 0:
+        cache.set(_revoked_key(token[api_settings.JTI_CLAIM]), True, timeout=timeout)
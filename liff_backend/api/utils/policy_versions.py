@@ -0,0 +1,57 @@
+import time
+
+from django.core.cache import cache
+
+
+def token_version_key(token_id):
+    return f"token_policy_version:{token_id}"
+
+
+def template_version_key(template_id):
+    return f"policy_template_version:{template_id}"
+
+
+def read_versions(keys):
+    """Current value of each version counter, in one round trip when they all exist."""
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            # Seed with a timestamp so a lost counter never reuses a version a worker still holds
+            cache.add(key, time.time_ns(), timeout=None)
+            values[key] = cache.get(key)
+    return tuple(values[key] for key in keys)
+
+
+async def aread_versions(keys):
+    values = await cache.aget_many(keys)
+    for key in keys:
+        if key not in values:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            values[key] = await cache.aget(key)
+    return tuple(values[key] for key in keys)
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+async def abump_version(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+
+
+def get_template_version(template_id):
+    return read_versions([template_version_key(template_id)])[0]
+
+
+async def aget_template_version(template_id):
+    return (await aread_versions([template_version_key(template_id)]))[0]
+
+
+def bump_template_version(template_id):
+    bump_version(template_version_key(template_id))
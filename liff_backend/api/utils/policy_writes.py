@@ -0,0 +1,78 @@
+from django.db import transaction
+
+from api.models import AllowedOrigin, AllowedEndpoint, PermissionScope
+from api.utils.token_policy import SCOPE_FIELDS
+
+SCOPE_FLAGS = tuple(SCOPE_FIELDS.values())
+
+
+def _sync_values(model, field, token_record, values, replace):
+    wanted = dict.fromkeys(values)
+    existing = set()
+    stale = []
+    for pk, value in model.objects.filter(token=token_record).values_list('pk', field):
+        if value in existing or (replace and value not in wanted):
+            stale.append(pk)
+        else:
+            existing.add(value)
+
+    missing = [model(token=token_record, **{field: value}) for value in wanted if value not in existing]
+    if stale:
+        model.objects.filter(pk__in=stale).delete()
+    if missing:
+        model.objects.bulk_create(missing)
+    return bool(stale or missing)
+
+
+def _sync_scopes(token_record, scopes, replace):
+    wanted = {}
+    for scope in scopes:
+        model = scope.get('model_name')
+        if model:
+            wanted.setdefault(model, {}).update({field: scope[field] for field in SCOPE_FLAGS if field in scope})
+
+    existing = {scope.model_name: scope for scope in PermissionScope.objects.filter(token=token_record)}
+    stale = [scope.pk for model, scope in existing.items() if replace and model not in wanted]
+    created = []
+    changed = []
+    for model, flags in wanted.items():
+        if replace:
+            flags = {field: flags.get(field, False) for field in SCOPE_FLAGS}
+        scope = existing.get(model)
+        if scope is None:
+            created.append(PermissionScope(token=token_record, model_name=model, **flags))
+        elif any(getattr(scope, field) != value for field, value in flags.items()):
+            for field, value in flags.items():
+                setattr(scope, field, value)
+            changed.append(scope)
+
+    if stale:
+        PermissionScope.objects.filter(pk__in=stale).delete()
+    if created:
+        PermissionScope.objects.bulk_create(created)
+    if changed:
+        PermissionScope.objects.bulk_update(changed, SCOPE_FLAGS)
+    return bool(stale or created or changed)
+
+
+def apply_token_policy(token_record, origins=None, endpoints=None, scopes=None, replace=False):
+    """
+    Bring the token's origins, endpoints and scopes in line with the request in
+    one transaction, writing only the rows that differ. With replace=True the
+    given lists become the whole policy and the policy template is detached;
+    otherwise entries are added and scope flags merged. None leaves a part as is.
+    Returns True when anything was written.
+    """
+    changed = False
+    with transaction.atomic():
+        if replace and token_record.policy_template_id:
+            token_record.policy_template = None
+            token_record.save(update_fields=['policy_template'])
+            changed = True
+        if origins is not None:
+            changed |= _sync_values(AllowedOrigin, 'origin', token_record, origins, replace)
+        if endpoints is not None:
+            changed |= _sync_values(AllowedEndpoint, 'path', token_record, endpoints, replace)
+        if scopes is not None:
+            changed |= _sync_scopes(token_record, scopes, replace)
+    return changed
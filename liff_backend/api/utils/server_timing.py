@@ -0,0 +1,72 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+import redis
+
+_timings = contextvars.ContextVar('server_timing', default=None)
+
+
+class RequestTimings:
+    """Time spent per phase of one request; phases may overlap, e.g. db inside policy."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, phase, seconds, detail=None):
+        entry = self.phases.setdefault((phase, detail), [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def header(self, total=None):
+        """Server-Timing value; detail (the Odoo model and method) goes in desc."""
+        entries = []
+        for (phase, detail), (seconds, count) in self.phases.items():
+            desc = f"{detail} x{count}" if detail else f"x{count}"
+            entries.append(f'{phase};dur={seconds * 1000:.1f};desc="{desc}"')
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+    def as_dict(self):
+        return {
+            f"{phase}:{detail}" if detail else phase: {"ms": round(seconds * 1000, 1), "count": count}
+            for (phase, detail), (seconds, count) in self.phases.items()
+        }
+
+
+def begin():
+    """Start collecting for the current request; returns (timings, token for end())."""
+    timings = RequestTimings()
+    return timings, _timings.set(timings)
+
+
+def end(token):
+    _timings.reset(token)
+
+
+def record(phase, started, detail=None):
+    """Add the time since started (a perf_counter value) to the current request, if any."""
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(phase, time.perf_counter() - started, detail)
+
+
+@contextmanager
+def timed(phase, detail=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, started, detail)
+
+
+class TimedRedis(redis.Redis):
+    """Redis client for django_redis' REDIS_CLIENT_CLASS that reports each command as the redis phase."""
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            record('redis', started)
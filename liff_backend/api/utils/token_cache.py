@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from api.utils.local_cache import LocalLRUCache
+from api.utils.metrics import cache_lookup
+
+_verified_tokens = LocalLRUCache(maxsize=settings.JWT_CACHE_SIZE, ttl=settings.JWT_CACHE_MAX_TTL)
+
+
+def _signature(raw_token):
+    return raw_token.rsplit('.', 1)[-1]
+
+
+def get_verified_token(raw_token):
+    """Return (validated_token, user) for a JWT this worker has already verified, else None."""
+    entry = _verified_tokens.get(_signature(raw_token))
+    if entry is None or entry[0] != raw_token:
+        cache_lookup('verified_token', 'miss')
+        return None
+    cache_lookup('verified_token', 'local')
+    return entry[1], entry[2]
+
+
+def remember_verified_token(raw_token, validated_token, user):
+    ttl = min(validated_token.get('exp', 0) - time.time(), settings.JWT_CACHE_MAX_TTL)
+    if ttl > 0:
+        _verified_tokens.set(_signature(raw_token), (raw_token, validated_token, user), ttl=ttl)
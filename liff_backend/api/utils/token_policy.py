@@ -0,0 +1,116 @@
+from api.models import (
+    AllowedOrigin, AllowedEndpoint, PermissionScope,
+    TemplateOrigin, TemplateEndpoint, TemplateScope,
+)
+from api.utils.endpoint_matcher import EndpointMatcher
+
+SCOPE_FIELDS = {
+    "create": "can_create",
+    "read": "can_read",
+    "update": "can_update",
+    "delete": "can_delete",
+    "approve": "can_approve",
+    "reject": "can_reject",
+}
+
+SCOPE_BITS = {action: 1 << index for index, action in enumerate(SCOPE_FIELDS)}
+
+
+def normalize_origin(origin):
+    return origin.replace("http://", "").replace("https://", "").rstrip('/').lower()
+
+
+def scope_mask(scope):
+    mask = 0
+    for action, field in SCOPE_FIELDS.items():
+        if scope.get(field):
+            mask |= SCOPE_BITS[action]
+    return mask
+
+
+class TokenPolicy:
+    """
+    Immutable snapshot of everything a token may do: normalized origin hosts,
+    compiled endpoint matcher and a bitmask of the can_* flags per model.
+    Grants from the token's policy template are merged with its own rows;
+    a token scope overrides the template scope for the same model.
+    """
+
+    __slots__ = ('token_id', 'access_digest', 'origins', 'endpoints', 'scopes', 'template_id')
+
+    def __init__(self, token_id=None, access_digest='', origins=(), endpoints=(), scopes=None, template_id=None):
+        set_ = object.__setattr__
+        set_(self, 'token_id', token_id)
+        set_(self, 'access_digest', access_digest)
+        set_(self, 'origins', frozenset(origins))
+        set_(self, 'endpoints', EndpointMatcher(endpoints))
+        set_(self, 'scopes', dict(scopes or {}))
+        set_(self, 'template_id', template_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TokenPolicy is immutable")
+
+    def __reduce__(self):
+        return (self.__class__, self.dump())
+
+    def dump(self):
+        return (
+            self.token_id, self.access_digest, tuple(sorted(self.origins)),
+            self.endpoints.paths, self.scopes, self.template_id,
+        )
+
+    def allows_host(self, host):
+        return host in self.origins
+
+    def allows_path(self, path):
+        return self.endpoints.match(path)
+
+    def has_model(self, model):
+        return model in self.scopes
+
+    def can(self, model, action):
+        return bool(self.scopes.get(model, 0) & SCOPE_BITS.get(action, 0))
+
+    @classmethod
+    def load(cls, token_id=None, access_digest='', template_id=None):
+        origins, endpoints, scope_rows = [], [], []
+        for origin_model, endpoint_model, scope_model, owner in _policy_sources(token_id, template_id):
+            origins += origin_model.objects.filter(**owner).values_list('origin', flat=True)
+            endpoints += endpoint_model.objects.filter(**owner).values_list('path', flat=True)
+            scope_rows += scope_model.objects.filter(**owner).values('model_name', *SCOPE_FIELDS.values())
+        return cls._from_rows(token_id, access_digest, template_id, origins, endpoints, scope_rows)
+
+    @classmethod
+    async def aload(cls, token_id=None, access_digest='', template_id=None):
+        origins, endpoints, scope_rows = [], [], []
+        for origin_model, endpoint_model, scope_model, owner in _policy_sources(token_id, template_id):
+            origins += [origin async for origin in origin_model.objects.filter(**owner).values_list('origin', flat=True)]
+            endpoints += [path async for path in endpoint_model.objects.filter(**owner).values_list('path', flat=True)]
+            scope_rows += [
+                scope async for scope in scope_model.objects.filter(**owner).values('model_name', *SCOPE_FIELDS.values())
+            ]
+        return cls._from_rows(token_id, access_digest, template_id, origins, endpoints, scope_rows)
+
+    @classmethod
+    def _from_rows(cls, token_id, access_digest, template_id, origins, endpoints, scope_rows):
+        return cls(
+            token_id=token_id,
+            access_digest=access_digest,
+            origins={normalize_origin(origin) for origin in origins},
+            endpoints=endpoints,
+            scopes={scope['model_name']: scope_mask(scope) for scope in scope_rows},
+            template_id=template_id,
+        )
+
+
+def _policy_sources(token_id, template_id):
+    # Template rows first so the token's own scopes override them
+    sources = []
+    if template_id:
+        sources.append((TemplateOrigin, TemplateEndpoint, TemplateScope, {'template_id': template_id}))
+    if token_id:
+        sources.append((AllowedOrigin, AllowedEndpoint, PermissionScope, {'token_id': token_id}))
+    return sources
+
+
+EMPTY_POLICY = TokenPolicy()
@@ -0,0 +1,106 @@
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from api.models import AllowedEndpoint, AllowedOrigin, OdooJWTToken, PermissionScope
+from api.utils.policy_cache import forget_swept_tokens
+
+odoo_logger = logging.getLogger('odoo')
+
+SWEEP_LOCK_KEY = 'token_sweeper_lock'
+
+_sweeper_thread = None
+_sweeper_lock = threading.Lock()
+
+
+def delete_token_batch(token_ids):
+    """Delete tokens and their child rows with plain DELETEs, bypassing the cascade collector."""
+    deleted = 0
+    for model in (AllowedEndpoint, AllowedOrigin, PermissionScope):
+        queryset = model.objects.filter(token_id__in=token_ids)
+        deleted += queryset._raw_delete(queryset.db)
+    queryset = OdooJWTToken.objects.filter(pk__in=token_ids)
+    return queryset._raw_delete(queryset.db), deleted
+
+
+def sweep_expired_tokens(batch_size=1000, max_batches=None, pause=0, report=None):
+    """
+    Delete tokens that expired before the sweep started, one short transaction
+    per batch so locks are only held for a single batch. Rows being updated
+    elsewhere are skipped and picked up by the next sweep. Each batch's cache
+    entries are dropped once it commits.
+    Returns (tokens, child rows) deleted.
+    """
+    now = timezone.now()
+    total_tokens = total_children = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        started = time.monotonic()
+        with transaction.atomic():
+            swept = list(
+                OdooJWTToken.objects.expired(now)
+                .order_by('expires_at')
+                .select_for_update(skip_locked=True)
+                .values_list('pk', 'access_token_digest')[:batch_size]
+            )
+            if not swept:
+                break
+            forget_swept_tokens(swept)
+            tokens, children = delete_token_batch([token_id for token_id, _ in swept])
+
+        batches += 1
+        total_tokens += tokens
+        total_children += children
+        if report:
+            report(batches, tokens, children, (time.monotonic() - started) * 1000)
+        if len(swept) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return total_tokens, total_children
+
+
+def _log_batch(batch, tokens, children, elapsed_ms):
+    odoo_logger.info(f"[SWEEP] batch={batch} tokens={tokens} children={children} time={elapsed_ms:.1f}ms")
+
+
+def _run_sweeper(interval):
+    while True:
+        time.sleep(interval * random.uniform(0.9, 1.1))
+        # The lock outlives the sweep so only one worker sweeps per interval.
+        if not cache.add(SWEEP_LOCK_KEY, 1, timeout=interval):
+            continue
+        try:
+            close_old_connections()
+            tokens, children = sweep_expired_tokens(
+                batch_size=settings.TOKEN_SWEEP_BATCH_SIZE,
+                max_batches=settings.TOKEN_SWEEP_MAX_BATCHES,
+                report=_log_batch,
+            )
+            if tokens:
+                odoo_logger.info(f"[SWEEP] removed tokens={tokens} children={children}")
+        except Exception:
+            odoo_logger.exception("Expired token sweep failed")
+        finally:
+            close_old_connections()
+
+
+def start_token_sweeper():
+    """Start the periodic sweeper thread once per worker process when TOKEN_SWEEP_INTERVAL is set."""
+    global _sweeper_thread
+    interval = settings.TOKEN_SWEEP_INTERVAL
+    if interval <= 0:
+        return
+    with _sweeper_lock:
+        if _sweeper_thread is None:
+            _sweeper_thread = threading.Thread(
+                target=_run_sweeper, args=(interval,), name='token-sweeper', daemon=True
+            )
+            _sweeper_thread.start()
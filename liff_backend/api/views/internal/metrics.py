@@ -0,0 +1,18 @@
+from django.http import HttpResponse
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from api.permissions import IsInternalNetwork
+from api.utils.metrics import flush_metrics, read_metrics, render_metrics
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="ค่า metrics ของ gateway และ Odoo ในรูปแบบ Prometheus รวมทุก worker (เฉพาะเครือข่ายภายใน)",
+)
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([IsInternalNetwork])
+def gateway_metrics(request):
+    # The other workers flush on their own timer
+    flush_metrics()
+    return HttpResponse(render_metrics(*read_metrics()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,24 @@
+import os
+
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.response import Response
+from api.permissions import IsInternalNetwork
+from api.utils.odoo_resilience import OPEN, breaker_states
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="สถานะ circuit breaker ของการเรียก Odoo แยกตาม model (เฉพาะเครือข่ายภายใน)",
+)
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([IsInternalNetwork])
+def odoo_circuit_state(request):
+    breakers = breaker_states()
+    return Response({
+        # Breakers are per worker process
+        'pid': os.getpid(),
+        'healthy': all(state['state'] != OPEN for state in breakers.values()),
+        'breakers': breakers,
+    })
@@ -0,0 +1,8 @@
+from django.urls import path
+from .metrics import gateway_metrics
+from .odoo_health import odoo_circuit_state
+
+urlpatterns = [
+    path("internal/odoo/circuit/", odoo_circuit_state),
+    path("internal/metrics/", gateway_metrics),
+]
@@ -1,31 +1,181 @@
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
 from api.models import *
 from api.utils.logger import log_exception, log_action, log_warning
+from api.utils.async_views import async_api_view
+from api.utils.odoo import aodoo_rpc_call, get_async_odoo_client, get_odoo_client, odoo_rpc_call
+from api.utils.odoo_resilience import OdooUnavailable
+from api.utils.policy_cache import aresolve_token_id, load_template_policy, resolve_token_id
+from api.utils.policy_claims import attach_policy_claims
+from api.utils.token_policy import TokenPolicy
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-import os, requests 
-from datetime import datetime, timedelta
+import hashlib
+import hmac
+import os
+import time
+from datetime import timedelta
 
 from dotenv import load_dotenv
 import warnings
-import sys
 
 load_dotenv()
 warnings.filterwarnings("ignore")
-print(sys.version)
 
 ODOO_DB = os.getenv('ODOO_DB')
+DEFAULT_LOGIN_ENDPOINTS = ['/e-learning/read/', '/km/create/']
 
 import logging
 
 odoo_logger = logging.getLogger('odoo')
 
+
+def _missing_credentials(username, password):
+    if username and password:
+        return False
+    log_warning("odoo_login", "missing credentials", user_id=username)
+    odoo_logger.warning("Login failed: Missing credentials - username=%s", username)
+    return True
+
+
+def _cached_login(username, cached_session):
+    log_action("odoo_login", "cached", user_id=username)
+    odoo_logger.info("[CACHE] Using cached session for %s", username)
+    return {'success': True, **cached_session}
+
+
+def _invalid_credentials(username, res):
+    if res.status_code == 200 and 'result' in res.json():
+        return False
+    log_warning("odoo_login", "invalid credentials", user_id=username)
+    odoo_logger.warning("Login failed for user=%s", username)
+    return True
+
+
+def _employee_search_args(uid):
+    return (
+        'hr.employee', 'search_read', [[["user_id", "=", uid]]],
+        {"fields": ["id", "name", "last_name", "level", "job_id", "department_id"]},
+    )
+
+
+def _mint_login_pair(user, uid, username, employee_id, session_id, load_policy):
+    refresh = RefreshToken.for_user(user)
+    refresh['uid'] = uid
+    refresh['employee_id'] = employee_id
+    refresh['session_id'] = session_id
+    refresh['username'] = username
+    attach_policy_claims(refresh, load_policy)
+    return str(refresh.access_token), str(refresh)
+
+
+def issue_login_tokens(uid, username, employee_id, session_id):
+    """
+    Return a new (access, refresh) pair for this Odoo session. Odoo opens a new
+    session on every authenticate, so there is no stored pair to reuse here;
+    repeat logins are answered from the login cache before reaching this.
+    """
+    user, _ = User.objects.get_or_create(username=f"odoo_user_{uid}")
+    with transaction.atomic():
+        # The default template is inherited by FK, so a new login is a single INSERT
+        template = PolicyTemplate.objects.filter(name=settings.GATEWAY_DEFAULT_POLICY_TEMPLATE).first()
+        if template:
+            load_policy = lambda: load_template_policy(template.pk)
+        else:
+            load_policy = lambda: (None, TokenPolicy(endpoints=DEFAULT_LOGIN_ENDPOINTS))
+        access_token, refresh_token = _mint_login_pair(user, uid, username, employee_id, session_id, load_policy)
+
+        token = OdooJWTToken.objects.create(
+            name=username,
+            user_id=uid,
+            session_id=session_id,
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_at=timezone.now() + timedelta(days=1),
+            policy_template=template,
+        )
+
+        # origins = ['https://example.com']
+        # for origin in origins:
+        #     AllowedOrigin.objects.create(token=token, origin=origin)
+
+        if template is None:
+            AllowedEndpoint.objects.bulk_create([AllowedEndpoint(token=token, path=path) for path in DEFAULT_LOGIN_ENDPOINTS])
+
+        # PermissionScope.objects.create(
+        #     token=token,
+        #     model_name='hr.employee',
+        #     can_create=False,
+        #     can_read=True,
+        #     can_update=False,
+        #     can_delete=False
+        # )
+
+    return access_token, refresh_token
+
+
+def _login_cache_key(username):
+    return f"odoo_session:{username}"
+
+
+def _credentials_digest(username, password):
+    return hmac.new(settings.SECRET_KEY.encode(), f"{username}\0{password}".encode(), hashlib.sha256).hexdigest()
+
+
+def _cached_session(entry, username, password):
+    """The stored login response, if it was made with these credentials."""
+    if not isinstance(entry, dict) or 'credentials' not in entry:
+        return None
+    if not hmac.compare_digest(entry['credentials'], _credentials_digest(username, password)):
+        return None
+    return entry['response']
+
+
+def _login_cache_entry(username, password, response_data):
+    """Cache entry and timeout; GATEWAY_LOGIN_CACHE_TTL, but never past the access token's expiry."""
+    expires_at = AccessToken(response_data['access'])['exp']
+    timeout = min(settings.GATEWAY_LOGIN_CACHE_TTL, int(expires_at - time.time()))
+    return {'credentials': _credentials_digest(username, password), 'response': response_data}, timeout
+
+
+def _login_response(result, session_id, employee_data, access_token, refresh_token, db):
+    employee_info = employee_data[0] if employee_data else {}
+    return {
+        'access': access_token,
+        'refresh': refresh_token,
+        'session_id': session_id,
+        'user_id': result.get('uid'),
+        'employee_id': employee_info.get('id'),
+        'name': employee_info.get('name'),
+        'last_name': employee_info.get('last_name'),
+        'level': employee_info.get('level'),
+        'job_id': employee_info.get('job_id', [None])[0],
+        'job_name': employee_info.get('job_id', [None, None])[1],
+        'department_id': employee_info.get('department_id', [None])[0],
+        'department_name': employee_info.get('department_id', [None, None])[1],
+        'user_context': result.get('user_context'),
+        'db': db,
+        'success': True
+    }
+
+
+def _login_succeeded(username, response_data):
+    log_action("odoo_login", "success", user_id=username, extra=f"uid={response_data['user_id']}")
+    odoo_logger.info(
+        "User %s logged in (uid=%s, emp=%s)", username, response_data['user_id'], response_data['employee_id']
+    )
+
+
 @swagger_auto_schema(
     method='post',
     request_body=openapi.Schema(
@@ -47,135 +197,82 @@ def odoo_login(request):
         log_action("odoo_login", "start", user_id=username)
         db = os.getenv('ODOO_DB')
 
-        if not username or not password:
-            log_warning("odoo_login", "missing credentials", user_id=username)
-            odoo_logger.warning(f"Login failed: Missing credentials - username={username}")
+        if _missing_credentials(username, password):
             return Response({'success': False, 'message': 'กรุณาระบุชื่อผู้ใช้และรหัสผ่าน'}, status=400)
 
-        cache_key = f"odoo_session:{username}"
-        cached_session = cache.get(cache_key)
-
-        if cached_session:
-            log_action("odoo_login", "cached", user_id=username)
-            odoo_logger.info(f"[CACHE] Using cached session for {username}")
-            return Response({
-                'success': True,
-                **cached_session
-            })
-
-        session_login_url = f"{os.getenv('ODOO_URL')}/web/session/authenticate"
-        headers = {'Content-Type': 'application/json'}
-        payload = {
-            "jsonrpc": "2.0",
-            "params": {
-                "db": db,
-                "login": username,
-                "password": password
-            }
-        }
+        cache_key = _login_cache_key(username)
+        cached_session = _cached_session(cache.get(cache_key), username, password)
+        # A pair that was rotated or deleted since is no longer mapped to a token
+        if cached_session and resolve_token_id(cached_session['access'], token_digest(cached_session['access'])):
+            return Response(_cached_login(username, cached_session))
 
-        res = requests.post(session_login_url, json=payload, headers=headers)
-        if res.status_code != 200 or 'result' not in res.json():
-            log_warning("odoo_login", "invalid credentials", user_id=username)
-            odoo_logger.warning(f"Login failed for user={username}")
+        res = get_odoo_client().authenticate(db, username, password)
+        if _invalid_credentials(username, res):
             return Response({'success': False, 'message': 'ชื่อผู้ใช้หรือรหัสผ่านไม่ถูกต้อง'}, status=401)
 
         result = res.json()['result']
         session_id = res.cookies.get('session_id')
         uid = result.get('uid')
 
-        employee_payload = {
-            "jsonrpc": "2.0",
-            "method": "call",
-            "params": {
-                "model": "hr.employee",
-                "method": "search_read",
-                "args": [[["user_id", "=", uid]]],
-                "kwargs": {"fields": ["id", "name", "last_name", "level", "job_id", "department_id"]}
-            },
-            "id": 1
-        }
-
-        employee_res = requests.post(
-            f"{os.getenv('ODOO_URL')}/web/dataset/call_kw",
-            json=employee_payload,
-            headers=headers,
-            cookies={'session_id': session_id}
-        )
+        model, method, args, kwargs = _employee_search_args(uid)
+        employee_data = odoo_rpc_call(session_id, model, method, args, kwargs=kwargs).get('result', [])
+        employee_id = employee_data[0].get('id') if employee_data else None
 
-        employee_data = employee_res.json().get('result', [])
-        employee_info = employee_data[0] if employee_data else {}
-        employee_id = employee_info.get('id')
-        name = employee_info.get('name')
-        last_name = employee_info.get('last_name')
-        level = employee_info.get('level')
-        job_id = employee_info.get('job_id', [None])[0]
-        job_name = employee_info.get('job_id', [None, None])[1]
-        department_id = employee_info.get('department_id', [None])[0]
-        department_name = employee_info.get('department_id', [None, None])[1]
+        access_token, refresh_token = issue_login_tokens(uid, username, employee_id, session_id)
+        response_data = _login_response(result, session_id, employee_data, access_token, refresh_token, db)
 
+        entry, timeout = _login_cache_entry(username, password, response_data)
+        cache.set(cache_key, entry, timeout=timeout)
+        _login_succeeded(username, response_data)
+        return Response(response_data)
 
+    except OdooUnavailable as e:
+        log_warning("odoo_login", str(e), user_id=request.data.get('username'))
+        return Response({'success': False, 'message': 'ระบบ Odoo ไม่พร้อมใช้งาน กรุณาลองใหม่อีกครั้ง'}, status=503)
+    except Exception as e:
+        odoo_logger.exception(f"Unexpected error in odoo_login for username={request.data.get('username')}")
+        return Response({'success': False, 'message': log_exception(e)}, status=500)
 
-        user, _ = User.objects.get_or_create(username=f"odoo_user_{uid}")
-        refresh = RefreshToken.for_user(user)
-        refresh['uid'] = uid
-        refresh['employee_id'] = employee_id
-        refresh['session_id'] = session_id
-        refresh['username'] = username
 
-        access_token = str(refresh.access_token)
-        refresh_token = str(refresh)
+@async_api_view(['POST'], authenticated=False)
+async def aodoo_login(request):
+    try:
+        username = request.data.get('username')
+        password = request.data.get('password')
+        log_action("odoo_login", "start", user_id=username)
+        db = os.getenv('ODOO_DB')
 
-        token = OdooJWTToken.objects.create(
-            name=username,
-            user_id=uid,
-            session_id=session_id,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            expires_at=datetime.utcnow() + timedelta(days=1),
-        )
+        if _missing_credentials(username, password):
+            return JsonResponse({'success': False, 'message': 'กรุณาระบุชื่อผู้ใช้และรหัสผ่าน'}, status=400)
 
-        # origins = ['https://example.com']
-        # for origin in origins:
-        #     AllowedOrigin.objects.create(token=token, origin=origin)
+        cache_key = _login_cache_key(username)
+        cached_session = _cached_session(await cache.aget(cache_key), username, password)
+        if cached_session and await aresolve_token_id(cached_session['access'], token_digest(cached_session['access'])):
+            return JsonResponse(_cached_login(username, cached_session))
 
-        endpoints = ['/e-learning/read/', '/km/create/']
-        for path in endpoints:
-            AllowedEndpoint.objects.create(token=token, path=path)
+        res = await get_async_odoo_client().authenticate(db, username, password)
+        if _invalid_credentials(username, res):
+            return JsonResponse({'success': False, 'message': 'ชื่อผู้ใช้หรือรหัสผ่านไม่ถูกต้อง'}, status=401)
 
-        # PermissionScope.objects.create(
-        #     token=token,
-        #     model_name='hr.employee',
-        #     can_create=False,
-        #     can_read=True,
-        #     can_update=False,
-        #     can_delete=False
-        # )
+        result = res.json()['result']
+        session_id = res.cookies.get('session_id')
+        uid = result.get('uid')
 
-        response_data = {
-            'access': access_token,
-            'refresh': refresh_token,
-            'session_id': session_id,
-            'user_id': uid,
-            'employee_id': employee_id,
-            'name': name,
-            'last_name': last_name,
-            'level': level,
-            'job_id': job_id,
-            'job_name': job_name,
-            'department_id': department_id,
-            'department_name': department_name,
-            'user_context': result.get('user_context'),
-            'db': db,
-            'success': True
-        }
+        model, method, args, kwargs = _employee_search_args(uid)
+        employee_data = (await aodoo_rpc_call(session_id, model, method, args, kwargs=kwargs)).get('result', [])
+        employee_id = employee_data[0].get('id') if employee_data else None
 
-        cache.set(cache_key, response_data, timeout=3600)
-        log_action("odoo_login", "success", user_id=username, extra=f"uid={uid}")
-        odoo_logger.info(f"User {username} logged in (uid={uid}, emp={employee_id})")
+        access_token, refresh_token = await sync_to_async(issue_login_tokens)(uid, username, employee_id, session_id)
+        response_data = _login_response(result, session_id, employee_data, access_token, refresh_token, db)
 
-        return Response(response_data)
+        entry, timeout = _login_cache_entry(username, password, response_data)
+        await cache.aset(cache_key, entry, timeout=timeout)
+        _login_succeeded(username, response_data)
+        return JsonResponse(response_data)
 
+    except OdooUnavailable as e:
+        log_warning("odoo_login", str(e), user_id=request.data.get('username'))
+        return JsonResponse({'success': False, 'message': 'ระบบ Odoo ไม่พร้อมใช้งาน กรุณาลองใหม่อีกครั้ง'}, status=503)
     except Exception as e:
         odoo_logger.exception(f"Unexpected error in odoo_login for username={request.data.get('username')}")
-        return Response({'success': False, 'message': log_exception(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'success': False, 'message': log_exception(e)}, status=500)
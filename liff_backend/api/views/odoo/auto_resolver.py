@@ -1,136 +1,654 @@
+import asyncio
+import base64
+import contextvars
+import json
+import re
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from api.models import OdooJWTToken, PermissionScope
+from api.authentication import ContextJWTAuthentication
 from api.permissions import IsEndpointAllowed
+from api.utils.async_views import AsyncAPIView
+from api.utils.auth_context import get_auth_context
 from api.utils.logger import log_action, log_exception, log_warning
+from api.utils.odoo import aodoo_rpc_call, odoo_rpc_call
+from api.utils.odoo_cache import acached_read, acached_records, cached_read, cached_records
+from api.utils.odoo_models import (
+    aget_model_fields, check_domain, check_field_names, check_order, default_fields, get_model_fields,
+    is_known_model,
+)
+from api.utils.odoo_resilience import OdooUnavailable
 from api.utils.security import is_host_allowed
 
-import os
-import requests
 
+METHOD_MAP = {
+    "create": "create",
+    "read": "search_read",
+    "update": "write",
+    "delete": "unlink",
+    "approve": "button_confirm_approve",
+    "reject": "button_reject",
+}
+
+FIELD_RE = re.compile(r'^[a-z_][a-z0-9_]*$')
+ORDER_RE = re.compile(r'^[a-z_][a-z0-9_.]*( (asc|desc))?(, ?[a-z_][a-z0-9_.]*( (asc|desc))?)*$', re.IGNORECASE)
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))["offset"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(offset, int):
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def ndjson_line(value):
+    return (json.dumps(value, ensure_ascii=False) + "\n").encode()
+
+
+class ResolveError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
 
-class AutoResolverAPI(APIView):
-    authentication_classes = [JWTAuthentication]
-    permission_classes = [IsAuthenticated, IsEndpointAllowed]
+
+class AutoResolverMixin:
+    """Request checks and Odoo call building shared by the sync and async resolvers."""
 
     def resolve_model(self, module):
-        return module
+        return module if is_known_model(module) else None
 
-    def resolve_permission(self, token, model, action):
-        scope = PermissionScope.objects.filter(token=token, model_name=model).first()
-        if not scope:
+    def resolve_permission(self, context, model, action):
+        if not context.policy.has_model(model):
             log_warning("auto_resolver", "unauthorized access")
             return False
+        return context.has_scope(model, action)
+
+    def field_list(self, value, name):
+        """a,b (or a list in a batch operation) as a list of distinct field names."""
+        if isinstance(value, str):
+            value = [field.strip() for field in value.split(',') if field.strip()]
+        if not isinstance(value, list) or not all(isinstance(field, str) and FIELD_RE.match(field) for field in value):
+            raise ResolveError(f"Invalid {name}", 400)
+        return list(dict.fromkeys(value))
+
+    def read_fields(self, model, params):
+        """fields=a,b; None leaves the choice to the model registry."""
+        fields = params.get('fields')
+        if not fields:
+            return None
+        return ['id'] + [field for field in self.field_list(fields, "fields") if field != 'id']
+
+    def read_expand(self, params):
+        """expand=a,b: many2one fields to replace with their related records."""
+        expand = params.get('expand')
+        return self.field_list(expand, "expand") if expand else []
+
+    def read_domain(self, params):
+        """domain=<JSON list> (or a list in a batch operation)."""
+        domain = params.get('domain')
+        if not domain:
+            return []
+        if isinstance(domain, str):
+            try:
+                domain = json.loads(domain)
+            except ValueError:
+                raise ResolveError("Invalid domain", 400)
+        if not isinstance(domain, list):
+            raise ResolveError("Invalid domain", 400)
+        return domain
+
+    def is_stream(self, params):
+        return params.get('stream') == 'ndjson'
+
+    def read_kwargs(self, params):
+        """
+        search_read kwargs from limit, offset or cursor, and order. A streamed
+        read has no default or maximum limit; without one it reads to the end.
+        """
+        stream = self.is_stream(params)
+        try:
+            limit = params.get('limit') or (None if stream else settings.GATEWAY_READ_DEFAULT_LIMIT)
+            limit = int(limit) if limit is not None else None
+            cursor = params.get('cursor')
+            offset = decode_cursor(cursor) if cursor else int(params.get('offset') or 0)
+        except (TypeError, ValueError):
+            raise ResolveError("Invalid limit, offset or cursor", 400)
+        if stream and limit is not None and limit <= 0:
+            raise ResolveError("limit must be positive", 400)
+        if not stream and not 0 < limit <= settings.GATEWAY_READ_MAX_LIMIT:
+            raise ResolveError(f"limit must be between 1 and {settings.GATEWAY_READ_MAX_LIMIT}", 400)
+        if offset < 0:
+            raise ResolveError("offset must not be negative", 400)
+
+        kwargs = {"limit": limit, "offset": offset}
+        order = params.get('order')
+        if order:
+            if not isinstance(order, str) or not ORDER_RE.match(order):
+                raise ResolveError("Invalid order", 400)
+            kwargs["order"] = order
+        return kwargs
+
+    def is_bulk(self, action, res_id, data):
+        """A list of values to create, or {"ids": [...]} in place of res_id."""
+        if action == "create":
+            return isinstance(data, list)
+        return action in METHOD_MAP and action != "read" and not res_id and isinstance(data, dict) and 'ids' in data
+
+    def check_bulk_size(self, size):
+        if not 0 < size <= settings.GATEWAY_BULK_MAX_RECORDS:
+            raise ResolveError(f"Between 1 and {settings.GATEWAY_BULK_MAX_RECORDS} records per request", 400)
+
+    def bulk_ids(self, data):
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) and i > 0 for i in ids):
+            raise ResolveError("ids must be a list of record ids", 400)
+        ids = list(dict.fromkeys(ids))
+        self.check_bulk_size(len(ids))
+        return ids
+
+    def build_args(self, model, action, res_id, data, uid, params=None):
+        if action == "create":
+            if not self.is_bulk(action, res_id, data):
+                return [[data]]
+            if not all(isinstance(values, dict) for values in data):
+                raise ResolveError("create expects an object or a list of objects", 400)
+            self.check_bulk_size(len(data))
+            return [data]
+        if action == "read":
+            params = params or {}
+            domain = ([('id', '=', int(res_id))] if res_id else []) + self.read_domain(params)
+            return [domain, self.read_fields(model, params)]
+        if self.is_bulk(action, res_id, data):
+            ids = self.bulk_ids(data)
+            if action != "update":
+                return [ids]
+            if not isinstance(data.get('values'), dict) or not data['values']:
+                raise ResolveError("values must be an object", 400)
+            return [ids, data['values']]
+        if not res_id:
+            log_warning("auto_resolver", f"missing res_id for {action}", user_id=uid)
+            if action in ["approve", "reject"]:
+                raise ResolveError("res_id is required for approve/reject", 400)
+            raise ResolveError(f"res_id is required for {action}", 400)
+        if action == "update":
+            return [[int(res_id)], data]
+        return [[int(res_id)]]
+
+    def check_request(self, request):
+        """Request-level checks; returns (session_id, uid, context)."""
+        validated_token = request.auth
+        if validated_token is None:
+            log_warning("auto_resolver", "unauthorized access")
+            raise ResolveError("Unauthorized", 401)
+
+        session_id = validated_token.get("session_id")
+        uid = validated_token.get("uid")
+
+        context = get_auth_context(request)
+        if not context.is_authorized_token:
+            log_warning("auto_resolver", "token not found", user_id=uid)
+            raise ResolveError("Token not found", 401)
+
+        if not is_host_allowed(request, uid=uid):
+            raise ResolveError("Unauthorized host", 403)
+
+        return session_id, uid, context
+
+    def prepare_operation(self, context, uid, module, action, res_id, data, params=None):
+        """Check one operation against the token policy; returns (model, odoo_method, args, kwargs)."""
+        model = self.resolve_model(module)
+        if not model:
+            log_warning("auto_resolver", f"unknown model: {module}", user_id=uid)
+            raise ResolveError(f"Unknown model: {module}", 404)
+
+        if not self.resolve_permission(context, model, action):
+            log_warning("auto_resolver", f"permission denied: {action}", user_id=uid, extra=f"model={model}")
+            raise ResolveError("Permission denied", 403)
+
+        log_action(
+            "auto_resolver", action, user_id=uid, extra=f"model={model}, res_id={res_id}", model=model, res_id=res_id
+        )
+
+        if action not in METHOD_MAP:
+            log_warning("auto_resolver", f"unsupported action: {action}", user_id=uid)
+            raise ResolveError("Unsupported action", 400)
+
+        args = self.build_args(model, action, res_id, data, uid, params)
+        kwargs = self.read_kwargs(params or {}) if action == "read" else None
+        return model, METHOD_MAP[action], args, kwargs
+
+    def prepare_call(self, request, module, action, res_id):
+        """Check the token against the request; returns (session_id, uid, model, odoo_method, args, kwargs)."""
+        session_id, uid, context = self.check_request(request)
+        model, odoo_method, args, kwargs = self.prepare_operation(
+            context, uid, module, action, res_id, request.data, request.GET
+        )
+        return session_id, uid, model, odoo_method, args, kwargs
+
+    def request_expand(self, request, action):
+        if action != "read":
+            return []
+        expand = self.read_expand(request.GET)
+        if expand and self.is_stream(request.GET):
+            raise ResolveError("expand is not supported with stream", 400)
+        return expand
+
+    def known_count(self, kwargs, records):
+        """The total when the page itself proves it, so search_count can be skipped."""
+        if len(records) < kwargs["limit"] and (records or not kwargs["offset"]):
+            return kwargs["offset"] + len(records)
+        return None
+
+    def with_count(self, result, count_result):
+        if 'error' in count_result:
+            return count_result
+        return {**result, "count": count_result.get("result")}
+
+    def check_call(self, fields, model, odoo_method, args, kwargs, expand=None):
+        """
+        Validate a call against the model's fields_get metadata (None skips the
+        field checks) and fill in the default read fields; returns the args.
+        """
+        try:
+            if odoo_method == METHOD_MAP["read"]:
+                domain, names = args
+                check_domain(domain, fields)
+                if names is None:
+                    names = default_fields(model, fields)
+                elif fields is not None:
+                    check_field_names(names, fields)
+                if fields is not None and kwargs.get("order"):
+                    check_order(kwargs["order"], fields)
+                return [domain, names + [name for name in expand or [] if name not in names]]
+
+            if fields is not None and odoo_method in (METHOD_MAP["create"], METHOD_MAP["update"]):
+                for values in args[0] if odoo_method == METHOD_MAP["create"] else [args[-1]]:
+                    if isinstance(values, dict):
+                        check_field_names(list(values), fields)
+        except ValueError as e:
+            raise ResolveError(str(e), 400)
+        return args
+
+    def model_fields(self, uid, session_id, model, odoo_method):
+        if odoo_method not in (METHOD_MAP["read"], METHOD_MAP["create"], METHOD_MAP["update"]):
+            return None
+        return get_model_fields(uid, session_id, model)
+
+    async def amodel_fields(self, uid, session_id, model, odoo_method):
+        if odoo_method not in (METHOD_MAP["read"], METHOD_MAP["create"], METHOD_MAP["update"]):
+            return None
+        return await aget_model_fields(uid, session_id, model)
+
+    def expansion_plan(self, fields, expand):
+        """{related model: [many2one fields]} for expand, checked against the metadata and the token policy."""
+        if fields is None:
+            raise ResolveError("Cannot expand fields of this model", 400)
+        context = get_auth_context(self.request)
+        plan = {}
+        for name in expand:
+            field = fields.get(name) or {}
+            if field.get('type') != 'many2one' or not field.get('relation'):
+                raise ResolveError(f"{name} is not a many2one field", 400)
+            relation = field['relation']
+            if not is_known_model(relation) or not self.resolve_permission(context, relation, "read"):
+                raise ResolveError(f"Permission denied to expand {name}", 403)
+            plan.setdefault(relation, []).append(name)
+        return plan
+
+    def related_ids(self, records, names):
+        return sorted({record[name][0] for record in records for name in names if record.get(name)})
+
+    def expanded(self, result, plan, related):
+        """Copy of result with every expanded [id, name] pair replaced by its related record."""
+        records = []
+        for record in result["result"]:
+            record = dict(record)
+            for relation, names in plan.items():
+                for name in names:
+                    value = record.get(name)
+                    if value:
+                        record[name] = related[relation].get(value[0], {"id": value[0], "display_name": value[1]})
+            records.append(record)
+        return {**result, "result": records}
+
+    def related_fields(self, uid, session_id, relation):
+        if settings.GATEWAY_MODELS.get(relation):
+            return default_fields(relation, None)
+        return default_fields(relation, get_model_fields(uid, session_id, relation))
+
+    async def arelated_fields(self, uid, session_id, relation):
+        if settings.GATEWAY_MODELS.get(relation):
+            return default_fields(relation, None)
+        return default_fields(relation, await aget_model_fields(uid, session_id, relation))
+
+    def expand_records(self, uid, session_id, result, plan):
+        """One batched read per related model, behind the shared id-to-record cache."""
+        related = {}
+        for relation, names in plan.items():
+            ids = self.related_ids(result["result"], names)
+            fields = self.related_fields(uid, session_id, relation) if ids else []
+            related[relation] = cached_records(
+                uid, relation, ids, fields,
+                lambda missing: self.odoo_rpc(session_id, relation, 'read', [missing, fields])
+            ) if ids else {}
+        return self.expanded(result, plan, related)
+
+    async def aexpand_records(self, uid, session_id, result, plan):
+        async def load(relation, names):
+            ids = self.related_ids(result["result"], names)
+            if not ids:
+                return {}
+            fields = await self.arelated_fields(uid, session_id, relation)
+            return await acached_records(
+                uid, relation, ids, fields,
+                lambda missing: self.odoo_rpc(session_id, relation, 'read', [missing, fields])
+            )
+
+        loaded = await asyncio.gather(*(load(relation, names) for relation, names in plan.items()))
+        return self.expanded(result, plan, dict(zip(plan, loaded)))
+
+    def call_odoo(self, uid, session_id, model, odoo_method, args, kwargs=None, expand=None):
+        fetch = lambda method, call_args, call_kwargs=None: cached_read(
+            uid, model, method, call_args,
+            lambda: self.odoo_rpc(session_id, model, method, call_args, call_kwargs), call_kwargs
+        )
+        fields = self.model_fields(uid, session_id, model, odoo_method)
+        plan = self.expansion_plan(fields, expand) if expand else None
+        args = self.check_call(fields, model, odoo_method, args, kwargs, expand)
+        if odoo_method != METHOD_MAP["read"]:
+            return self.odoo_rpc(session_id, model, odoo_method, args, kwargs)
+
+        result = fetch(odoo_method, args, kwargs)
+        if 'error' in result:
+            return result
+        count = self.known_count(kwargs, result["result"])
+        result = {**result, "count": count} if count is not None else self.with_count(
+            result, fetch("search_count", [args[0]])
+        )
+        if plan and 'error' not in result:
+            result = self.expand_records(uid, session_id, result, plan)
+        return result
+
+    async def acall_odoo(self, uid, session_id, model, odoo_method, args, kwargs=None, expand=None):
+        fetch = lambda method, call_args, call_kwargs=None: acached_read(
+            uid, model, method, call_args,
+            lambda: self.odoo_rpc(session_id, model, method, call_args, call_kwargs), call_kwargs
+        )
+        fields = await self.amodel_fields(uid, session_id, model, odoo_method)
+        plan = self.expansion_plan(fields, expand) if expand else None
+        args = self.check_call(fields, model, odoo_method, args, kwargs, expand)
+        if odoo_method != METHOD_MAP["read"]:
+            return await self.odoo_rpc(session_id, model, odoo_method, args, kwargs)
+
+        result = await fetch(odoo_method, args, kwargs)
+        if 'error' in result:
+            return result
+        count = self.known_count(kwargs, result["result"])
+        result = {**result, "count": count} if count is not None else self.with_count(
+            result, await fetch("search_count", [args[0]])
+        )
+        if plan and 'error' not in result:
+            result = await self.aexpand_records(uid, session_id, result, plan)
+        return result
+
+    def bulk_items(self, odoo_method, args):
+        """The args of each record of a bulk call, as if it were sent alone."""
+        if odoo_method == METHOD_MAP["create"]:
+            return [[[values]] for values in args[0]]
+        return [[[res_id], *args[1:]] for res_id in args[0]]
+
+    def bulk_outcome(self, odoo_method, index, item, result):
+        if odoo_method == METHOD_MAP["create"]:
+            outcome = {"index": index, "id": None}
+        else:
+            outcome = {"id": item[0][0]}
+        if 'error' in result:
+            return {**outcome, "status": "error", "error": result['error'].get('message', 'Unknown Odoo error')}
+        if odoo_method == METHOD_MAP["create"]:
+            created = result.get("result")
+            outcome["id"] = created[0] if isinstance(created, list) else created
+        return {**outcome, "status": "ok"}
+
+    def bulk_outcomes(self, odoo_method, items, result):
+        """Per-record outcomes of a bulk call that went through as a whole."""
+        if odoo_method == METHOD_MAP["create"]:
+            results = [{"result": [created]} for created in result.get("result") or []]
+        else:
+            results = [result] * len(items)
+        return [self.bulk_outcome(odoo_method, index, item, res) for index, (item, res) in enumerate(zip(items, results))]
+
+    def unavailable(self, error):
+        return {"error": {"message": str(error)}}
+
+    def call_bulk(self, uid, session_id, model, odoo_method, args):
+        """
+        One Odoo call for every record. Odoo rolls a failed call back as a whole,
+        so on an error each record is sent alone to find out which ones fail.
+        """
+        fields = self.model_fields(uid, session_id, model, odoo_method)
+        args = self.check_call(fields, model, odoo_method, args, None)
+        items = self.bulk_items(odoo_method, args)
+        result = self.odoo_rpc(session_id, model, odoo_method, args)
+        if 'error' not in result:
+            return self.bulk_outcomes(odoo_method, items, result)
+        if len(items) == 1:
+            return [self.bulk_outcome(odoo_method, 0, items[0], result)]
+
+        outcomes = []
+        for index, item in enumerate(items):
+            try:
+                result = self.odoo_rpc(session_id, model, odoo_method, item)
+            except OdooUnavailable as e:
+                result = self.unavailable(e)
+            outcomes.append(self.bulk_outcome(odoo_method, index, item, result))
+        return outcomes
+
+    async def acall_bulk(self, uid, session_id, model, odoo_method, args):
+        fields = await self.amodel_fields(uid, session_id, model, odoo_method)
+        args = self.check_call(fields, model, odoo_method, args, None)
+        items = self.bulk_items(odoo_method, args)
+        result = await self.odoo_rpc(session_id, model, odoo_method, args)
+        if 'error' not in result:
+            return self.bulk_outcomes(odoo_method, items, result)
+        if len(items) == 1:
+            return [self.bulk_outcome(odoo_method, 0, items[0], result)]
+
+        outcomes = []
+        for index, item in enumerate(items):
+            try:
+                result = await self.odoo_rpc(session_id, model, odoo_method, item)
+            except OdooUnavailable as e:
+                result = self.unavailable(e)
+            outcomes.append(self.bulk_outcome(odoo_method, index, item, result))
+        return outcomes
+
+    def page_body(self, kwargs, result):
+        """count, limit, offset and next_cursor for a read."""
+        next_offset = kwargs["offset"] + len(result.get("result") or [])
         return {
-            "create": scope.can_create,
-            "read": scope.can_read,
-            "update": scope.can_update,
-            "delete": scope.can_delete,
-            "approve": scope.can_approve,
-            "reject": scope.can_reject,
-        }.get(action, False)
-
-    def odoo_rpc(self, session_id, model, method, args):
-        url = f"{os.getenv('ODOO_URL')}/web/dataset/call_kw"
-        payload = {
-            "jsonrpc": "2.0",
-            "method": "call",
-            "params": {
-                "model": model,
-                "method": method,
-                "args": args,
-                "kwargs": {},
-            },
-            "id": 1
+            "count": result.get("count"),
+            "limit": kwargs["limit"],
+            "offset": kwargs["offset"],
+            "next_cursor": encode_cursor(next_offset) if next_offset < (result.get("count") or 0) else None,
+        }
+
+    def next_link(self, request, cursor):
+        query = request.GET.copy()
+        query.pop('offset', None)
+        query['cursor'] = cursor
+        return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+    def stream_page(self, kwargs, offset, sent):
+        """kwargs for the next streamed page, or None once the requested limit is reached."""
+        size = settings.GATEWAY_STREAM_PAGE_SIZE
+        if kwargs["limit"] is not None:
+            size = min(size, kwargs["limit"] - sent)
+        if size <= 0:
+            return None
+        return {**kwargs, "limit": size, "offset": offset}
+
+    def next_stream_page(self, kwargs, page_kwargs, received, sent):
+        if received < page_kwargs["limit"]:
+            return None
+        return self.stream_page(kwargs, page_kwargs["offset"] + received, sent)
+
+    def stream_response(self, lines):
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        # Let records through reverse proxies as they arrive
+        response['X-Accel-Buffering'] = 'no'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def stream_error(self, result):
+        message = result['error'].get('message', 'Unknown Odoo error')
+        return {"error": message}
+
+    def success_body(self, odoo_method, result, kwargs=None, request=None):
+        body = {
+            "status": "success",
+            "odoo_method": odoo_method,
+            "result": result.get("result")
         }
-        headers = {'Content-Type': 'application/json'}
-        cookies = {'session_id': session_id}
-        return requests.post(url, json=payload, headers=headers, cookies=cookies).json()
+        if odoo_method == METHOD_MAP["read"] and 'error' not in result:
+            body.update(self.page_body(kwargs, result))
+            if request is not None:
+                body["next"] = self.next_link(request, body["next_cursor"]) if body["next_cursor"] else None
+        return body
+
+    def bulk_body(self, odoo_method, outcomes):
+        """Returns (body, http status); a bulk call where every record failed is a 400."""
+        failed = sum(outcome["status"] == "error" for outcome in outcomes)
+        status = "success" if not failed else "partial" if failed < len(outcomes) else "error"
+        body = {"status": status, "odoo_method": odoo_method, "failed": failed, "results": outcomes}
+        return body, 400 if status == "error" else 200
+
+
+class AutoResolverAPI(AutoResolverMixin, APIView):
+    authentication_classes = [ContextJWTAuthentication]
+    permission_classes = [IsAuthenticated, IsEndpointAllowed]
+
+    def odoo_rpc(self, session_id, model, method, args, kwargs=None):
+        return odoo_rpc_call(session_id, model, method, args, kwargs=kwargs)
+
+    def stream_lines(self, context, session_id, model, args, kwargs, page, page_kwargs):
+        sent = 0
+        while True:
+            records = page.get("result") or []
+            for record in records:
+                yield ndjson_line(record)
+            sent += len(records)
+            page_kwargs = self.next_stream_page(kwargs, page_kwargs, len(records), sent)
+            if page_kwargs is None:
+                return
+            try:
+                page = context.run(self.odoo_rpc, session_id, model, METHOD_MAP["read"], args, page_kwargs)
+            except OdooUnavailable as e:
+                page = {"error": {"message": str(e)}}
+            if 'error' in page:
+                yield ndjson_line(self.stream_error(page))
+                return
+
+    def stream_read(self, uid, session_id, model, args, kwargs):
+        """Read page by page and send each record as one NDJSON line; Odoo errors on the first page are a 400."""
+        fields = self.model_fields(uid, session_id, model, METHOD_MAP["read"])
+        args = self.check_call(fields, model, METHOD_MAP["read"], args, kwargs)
+        page_kwargs = self.stream_page(kwargs, kwargs["offset"], 0)
+        if page_kwargs is None:
+            return self.stream_response([])
+        page = self.odoo_rpc(session_id, model, METHOD_MAP["read"], args, page_kwargs)
+        if 'error' in page:
+            return Response(self.stream_error(page), status=400)
+        # Later pages are read after the middleware has returned; keep the request id and timings for them
+        context = contextvars.copy_context()
+        return self.stream_response(self.stream_lines(context, session_id, model, args, kwargs, page, page_kwargs))
 
     def post(self, request, channel, module, action, res_id=None):
         try:
-            version = request.version
-            jwt = JWTAuthentication()
-            user_auth = jwt.authenticate(request)
-            if not user_auth:
-                log_warning("auto_resolver", "unauthorized access")
-                return Response({"error": "Unauthorized"}, status=401)
-
-            user, validated_token = user_auth
-            session_id = validated_token.get("session_id")
-            uid = validated_token.get("uid")
-
-            token_record = OdooJWTToken.objects.filter(access_token=str(validated_token)).first()
-            if not token_record:
-                log_warning("auto_resolver", "token not found", user_id=uid)
-                return Response({"error": "Token not found"}, status=401)
-            
-            if not is_host_allowed(request, token_record, uid=uid):
-                return Response({"error": "Unauthorized host"}, status=403)
-            
-            model = self.resolve_model(module)
-            if not model:
-                log_warning("auto_resolver", f"unknown model: {module}", user_id=uid)
-                return Response({"error": f"Unknown model: {module}"}, status=404)
-
-            if not self.resolve_permission(token_record, model, action):
-                log_warning("auto_resolver", f"permission denied: {action}", user_id=uid, extra=f"model={model}")
-                return Response({"error": "Permission denied"}, status=403)
-
-            log_action("auto_resolver", action, user_id=uid, extra=f"model={model}, res_id={res_id}")
-            
-            method_map = {
-                "create": "create",
-                "read": "search_read",
-                "update": "write",
-                "delete": "unlink",
-                "approve": "button_confirm_approve",
-                "reject": "button_reject",
-            }
-
-            if action not in method_map:
-                log_warning("auto_resolver", f"unsupported action: {action}", user_id=uid)
-                return Response({"error": "Unsupported action"}, status=400)
-
-            odoo_method = method_map[action]
-
-            if action == "create":
-                args = [[request.data]]
-            elif action == "read":
-                domain = [('id', '=', int(res_id))] if res_id else []
-                fields = ['id', 'name']
-                if model == 'hr.employee':
-                    fields += ['job_id', 'department_id']
-                elif model == 'purchase.order':
-                    fields += ['state']
-                args = [domain, fields]
-            elif action == "update":
-                if not res_id:
-                    log_warning("auto_resolver", "missing res_id for update", user_id=uid)
-                    return Response({"error": "res_id is required for update"}, status=400)
-                args = [[int(res_id)], request.data]
-            elif action == "delete":
-                if not res_id:
-                    log_warning("auto_resolver", "missing res_id for delete", user_id=uid)
-                    return Response({"error": "res_id is required for delete"}, status=400)
-                args = [[int(res_id)]]
-            elif action in ["approve", "reject"]:
-                if not res_id:
-                    log_warning("auto_resolver", f"missing res_id for {action}", user_id=uid)
-                    return Response({"error": "res_id is required for approve/reject"}, status=400)
-                args = [[int(res_id)]]
-
-            result = self.odoo_rpc(session_id, model, odoo_method, args)
-
-            return Response({
-                "status": "success",
-                "odoo_method": odoo_method,
-                "result": result.get("result")
-            }, status=200)
+            session_id, uid, model, odoo_method, args, kwargs = self.prepare_call(request, module, action, res_id)
+            expand = self.request_expand(request, action)
+            if action == "read" and self.is_stream(request.GET):
+                return self.stream_read(uid, session_id, model, args, kwargs)
+            if self.is_bulk(action, res_id, request.data):
+                body, status = self.bulk_body(odoo_method, self.call_bulk(uid, session_id, model, odoo_method, args))
+                return Response(body, status=status)
+            result = self.call_odoo(uid, session_id, model, odoo_method, args, kwargs, expand)
+            return Response(self.success_body(odoo_method, result, kwargs, request), status=200)
 
+        except ResolveError as e:
+            return Response({"error": e.message}, status=e.status)
+        except OdooUnavailable as e:
+            return Response({"error": str(e)}, status=503)
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            log_exception(e)
             return Response({"error": str(e)}, status=500)
+
+
+class AsyncAutoResolverAPI(AutoResolverMixin, AsyncAPIView):
+    """AutoResolverAPI for the ASGI deployment; the Odoo call does not hold a worker thread."""
+
+    async def odoo_rpc(self, session_id, model, method, args, kwargs=None):
+        return await aodoo_rpc_call(session_id, model, method, args, kwargs=kwargs)
+
+    async def stream_lines(self, context, session_id, model, args, kwargs, page, page_kwargs):
+        sent = 0
+        while True:
+            records = page.get("result") or []
+            for record in records:
+                yield ndjson_line(record)
+            sent += len(records)
+            page_kwargs = self.next_stream_page(kwargs, page_kwargs, len(records), sent)
+            if page_kwargs is None:
+                return
+            try:
+                # A task copies the context it is created in
+                page = await context.run(
+                    asyncio.ensure_future, self.odoo_rpc(session_id, model, METHOD_MAP["read"], args, page_kwargs)
+                )
+            except OdooUnavailable as e:
+                page = {"error": {"message": str(e)}}
+            if 'error' in page:
+                yield ndjson_line(self.stream_error(page))
+                return
+
+    async def stream_read(self, uid, session_id, model, args, kwargs):
+        fields = await self.amodel_fields(uid, session_id, model, METHOD_MAP["read"])
+        args = self.check_call(fields, model, METHOD_MAP["read"], args, kwargs)
+        page_kwargs = self.stream_page(kwargs, kwargs["offset"], 0)
+        if page_kwargs is None:
+            return self.stream_response([])
+        page = await self.odoo_rpc(session_id, model, METHOD_MAP["read"], args, page_kwargs)
+        if 'error' in page:
+            return JsonResponse(self.stream_error(page), status=400)
+        context = contextvars.copy_context()
+        return self.stream_response(self.stream_lines(context, session_id, model, args, kwargs, page, page_kwargs))
+
+    async def post(self, request, channel, module, action, res_id=None):
+        try:
+            session_id, uid, model, odoo_method, args, kwargs = self.prepare_call(request, module, action, res_id)
+            expand = self.request_expand(request, action)
+            if action == "read" and self.is_stream(request.GET):
+                return await self.stream_read(uid, session_id, model, args, kwargs)
+            if self.is_bulk(action, res_id, request.data):
+                body, status = self.bulk_body(odoo_method, await self.acall_bulk(uid, session_id, model, odoo_method, args))
+                return JsonResponse(body, status=status)
+            result = await self.acall_odoo(uid, session_id, model, odoo_method, args, kwargs, expand)
+            return JsonResponse(self.success_body(odoo_method, result, kwargs, request), status=200)
+
+        except ResolveError as e:
+            return JsonResponse({"error": e.message}, status=e.status)
+        except OdooUnavailable as e:
+            return JsonResponse({"error": str(e)}, status=503)
+        except Exception as e:
+            log_exception(e)
+            return JsonResponse({"error": str(e)}, status=500)
@@ -0,0 +1,242 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.http import JsonResponse
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from api.authentication import ContextJWTAuthentication
+from api.permissions import IsEndpointAllowed
+from api.utils.async_views import AsyncAPIView
+from api.utils.logger import log_action, log_exception, log_warning
+from api.utils.odoo import aodoo_rpc_call, odoo_rpc_call
+from api.utils.odoo_resilience import OdooUnavailable
+from api.views.odoo.auto_resolver import AutoResolverMixin, ResolveError
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_batch_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.GATEWAY_BATCH_CONCURRENCY, thread_name_prefix='odoo-batch'
+                )
+    return _executor
+
+
+class BatchResolverMixin(AutoResolverMixin):
+    """
+    Runs an ordered list of auto-resolver operations for one authenticated
+    request. Consecutive reads run concurrently; any other action is a barrier
+    that runs alone, after everything before it and before everything after it.
+    """
+
+    def parse_operations(self, data):
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            raise ResolveError("operations must be a non-empty list", 400)
+        if len(operations) > settings.GATEWAY_BATCH_MAX_OPERATIONS:
+            raise ResolveError(f"At most {settings.GATEWAY_BATCH_MAX_OPERATIONS} operations per batch", 400)
+        return operations
+
+    def prepare_batch_operation(self, context, uid, operation):
+        if not isinstance(operation, dict):
+            raise ResolveError("Invalid operation", 400)
+        channel = operation.get('channel')
+        module = operation.get('module')
+        action = operation.get('action')
+        res_id = operation.get('res_id')
+        if not channel or not module or not action:
+            raise ResolveError("channel, module and action are required", 400)
+        # Same rule as the <str:> converters of /v1/auto/, so the path below can't reach another endpoint's grant
+        if not all(isinstance(part, str) and '/' not in part for part in (channel, module, action)):
+            raise ResolveError("channel, module and action must be path segments", 400)
+        if res_id is not None and (not isinstance(res_id, int) or isinstance(res_id, bool)):
+            raise ResolveError("Invalid res_id", 400)
+
+        path = f"/v1/auto/{channel}/{module}/{action}/" + (f"{res_id}/" if res_id else "")
+        if not context.is_path_allowed(path):
+            log_warning("batch", f"endpoint not allowed: {path}", user_id=uid)
+            raise ResolveError("Endpoint not allowed", 403)
+
+        params = operation.get('params') or {}
+        if not isinstance(params, dict):
+            raise ResolveError("params must be an object", 400)
+        if self.is_stream(params):
+            raise ResolveError("stream is not supported in a batch", 400)
+
+        try:
+            call = self.prepare_operation(context, uid, module, action, res_id, operation.get('data', {}), params)
+            return (*call, self.read_expand(params) if action == 'read' else [])
+        except ValueError:
+            raise ResolveError("Invalid res_id", 400)
+
+    def prepare_batch(self, context, uid, operations):
+        """
+        Returns (results, groups). results already holds the rejected operations;
+        groups lists (index, op_id, call) items to run group by group.
+        """
+        results = [None] * len(operations)
+        groups = []
+        previous_read = False
+        for index, operation in enumerate(operations):
+            op_id = operation.get('id', index) if isinstance(operation, dict) else index
+            try:
+                call = self.prepare_batch_operation(context, uid, operation)
+            except ResolveError as e:
+                results[index] = {"id": op_id, "status": e.status, "error": e.message}
+                continue
+
+            is_read = operation['action'] == 'read'
+            if is_read and previous_read:
+                groups[-1].append((index, op_id, call))
+            else:
+                groups.append([(index, op_id, call)])
+            previous_read = is_read
+        return results, groups
+
+    def operation_result(self, op_id, odoo_method, result=None, error=None, kwargs=None):
+        if error is not None:
+            status = 503 if isinstance(error, OdooUnavailable) else 502
+            return {"id": op_id, "status": status, "odoo_method": odoo_method, "error": str(error)}
+        if 'error' in result:
+            return {
+                "id": op_id,
+                "status": 400,
+                "odoo_method": odoo_method,
+                "error": result['error'].get('message', 'Unknown Odoo error'),
+            }
+        body = self.success_body(odoo_method, result, kwargs)
+        del body["status"]
+        return {"id": op_id, "status": 200, **body}
+
+
+batch_request_body = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    required=['operations'],
+    properties={
+        'operations': openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            description="รายการคำสั่ง auto-resolver ตามลำดับ (read ที่ติดกันจะทำงานพร้อมกัน)",
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                required=['channel', 'module', 'action'],
+                properties={
+                    'id': openapi.Schema(type=openapi.TYPE_STRING, description="รหัสอ้างอิงของคำสั่งในผลลัพธ์"),
+                    'channel': openapi.Schema(type=openapi.TYPE_STRING),
+                    'module': openapi.Schema(type=openapi.TYPE_STRING),
+                    'action': openapi.Schema(type=openapi.TYPE_STRING),
+                    'res_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'data': openapi.Schema(type=openapi.TYPE_OBJECT),
+                    'params': openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description="สำหรับ read: limit, offset หรือ cursor, order, fields, domain และ expand",
+                    ),
+                }
+            )
+        )
+    },
+    example={
+        "operations": [
+            {"id": "po", "channel": "erp", "module": "purchase.order", "action": "read", "res_id": 12},
+            {"id": "employee", "channel": "erp", "module": "hr.employee", "action": "read",
+             "params": {"limit": 20, "order": "name asc", "fields": ["name", "department_id"]}},
+            {"id": "approve", "channel": "erp", "module": "purchase.order", "action": "approve", "res_id": 12}
+        ]
+    }
+)
+
+
+class BatchResolverAPI(BatchResolverMixin, APIView):
+    authentication_classes = [ContextJWTAuthentication]
+    # /v1/batch/ itself must be granted; each operation's endpoint is checked again
+    permission_classes = [IsAuthenticated, IsEndpointAllowed]
+
+    def odoo_rpc(self, session_id, model, method, args, kwargs=None):
+        return odoo_rpc_call(session_id, model, method, args, kwargs=kwargs)
+
+    def run_operation(self, uid, session_id, item):
+        index, op_id, (model, odoo_method, args, kwargs, expand) = item
+        try:
+            result = self.call_odoo(uid, session_id, model, odoo_method, args, kwargs, expand)
+        except ResolveError as e:
+            return index, {"id": op_id, "status": e.status, "error": e.message}
+        except Exception as e:
+            log_exception(e)
+            return index, self.operation_result(op_id, odoo_method, error=e)
+        return index, self.operation_result(op_id, odoo_method, result, kwargs=kwargs)
+
+    @swagger_auto_schema(
+        request_body=batch_request_body,
+        operation_description="เรียกหลายคำสั่ง auto-resolver ในครั้งเดียว ตรวจสอบ token และสิทธิ์ครั้งเดียว",
+    )
+    def post(self, request):
+        try:
+            session_id, uid, context = self.check_request(request)
+            operations = self.parse_operations(request.data)
+            results, groups = self.prepare_batch(context, uid, operations)
+            log_action("batch", f"{len(operations)} operations", user_id=uid)
+
+            run = lambda item: self.run_operation(uid, session_id, item)
+            # Pool threads run in a copy of the request context, so their time still counts for Server-Timing
+            run_in = lambda item, context: context.run(run, item)
+            for items in groups:
+                if len(items) > 1:
+                    outcomes = get_batch_executor().map(run_in, items, [contextvars.copy_context() for _ in items])
+                else:
+                    outcomes = map(run, items)
+                for index, result in outcomes:
+                    results[index] = result
+
+            return Response({"status": "success", "results": results})
+
+        except ResolveError as e:
+            return Response({"error": e.message}, status=e.status)
+        except Exception as e:
+            return Response({"error": log_exception(e)}, status=500)
+
+
+class AsyncBatchResolverAPI(BatchResolverMixin, AsyncAPIView):
+    async def odoo_rpc(self, session_id, model, method, args, kwargs=None):
+        return await aodoo_rpc_call(session_id, model, method, args, kwargs=kwargs)
+
+    async def run_operation(self, uid, session_id, item, semaphore):
+        index, op_id, (model, odoo_method, args, kwargs, expand) = item
+        async with semaphore:
+            try:
+                result = await self.acall_odoo(uid, session_id, model, odoo_method, args, kwargs, expand)
+            except ResolveError as e:
+                return index, {"id": op_id, "status": e.status, "error": e.message}
+            except Exception as e:
+                log_exception(e)
+                return index, self.operation_result(op_id, odoo_method, error=e)
+        return index, self.operation_result(op_id, odoo_method, result, kwargs=kwargs)
+
+    async def post(self, request):
+        try:
+            session_id, uid, context = self.check_request(request)
+            operations = self.parse_operations(request.data)
+            results, groups = self.prepare_batch(context, uid, operations)
+            log_action("batch", f"{len(operations)} operations", user_id=uid)
+
+            semaphore = asyncio.Semaphore(settings.GATEWAY_BATCH_CONCURRENCY)
+            for items in groups:
+                outcomes = await asyncio.gather(*(self.run_operation(uid, session_id, item, semaphore) for item in items))
+                for index, result in outcomes:
+                    results[index] = result
+
+            return JsonResponse({"status": "success", "results": results})
+
+        except ResolveError as e:
+            return JsonResponse({"error": e.message}, status=e.status)
+        except Exception as e:
+            return JsonResponse({"error": log_exception(e)}, status=500)
@@ -5,8 +5,95 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from api.utils.permissions import IsEndpointAllowed
 from api.utils.logger import log_action, log_warning, log_exception
-from api.utils.odoo import odoo_rpc_call, log_odoo_session_usage
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from api.utils.async_views import async_api_view
+from api.utils.odoo import aodoo_rpc_call, odoo_rpc_call, log_odoo_session_usage
+from api.utils.odoo_cache import acached_search_read, cached_search_read
+
+ELEARNING_FIELDS = ['course_name', 'course_department', 'course_progress']
+
+
+def _error_response(e):
+    return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
+
+
+def _missing_create_key(data):
+    for key in ['user_id', 'session_id', 'employee_id']:
+        if key not in data:
+            log_warning("elearning", f"missing key: {key}", user_id=data.get('user_id'))
+            return JsonResponse({'status': 'error', 'message': f'Missing key: {key}'}, status=400)
+    return None
+
+
+def _create_call(data):
+    log_action("elearning", "create", user_id=data['user_id'])
+    log_odoo_session_usage(data['user_id'], data['session_id'], "Create E-learning")
+    return {
+        'session_id': data['session_id'],
+        'model': 'hr.employee',
+        'method': 'create',
+        'args': [[{
+            'name': data['name'],
+            'course_name': data.get('course_name'),
+            'course_department': data.get('course_department'),
+            'course_progress': data.get('course_progress')
+        }]],
+    }
+
+
+def _create_response(data, res):
+    if 'error' in res:
+        log_warning("elearning", f"odoo error: {res['error'].get('message')}", user_id=data['user_id'])
+        return JsonResponse({
+            'status': 'error',
+            'message': res['error'].get('message', 'Unknown Odoo error')
+        }, status=400)
+
+    return JsonResponse({
+        'status': 'success',
+        'elearning_id': res['result']
+    })
+
+
+def _read_query(request):
+    """(user_id, session_id, domain) for a read, taken from the token and the query string."""
+    validated_token = request.auth
+    session_id = validated_token['session_id']
+    user_id = validated_token['uid']
+    employee_id = request.GET.get('employee_id')
+
+    domain = [('id', '=', int(employee_id))] if employee_id else []
+
+    log_action("elearning", "read", user_id=user_id)
+    log_odoo_session_usage(user_id, session_id, "Read E-learning")
+    return user_id, session_id, domain
+
+
+def _update_call(data):
+    log_action("elearning", "update", user_id=data.get('user_id'), extra=f"id={data.get('employee_id')}")
+    log_odoo_session_usage(data['user_id'], data['session_id'], "Update E-learning")
+
+    update_fields = {}
+    for key in ELEARNING_FIELDS:
+        if key in data:
+            update_fields[key] = data[key]
+
+    return {
+        'session_id': data['session_id'],
+        'model': 'hr.employee',
+        'method': 'write',
+        'args': [[int(data['employee_id'])], update_fields],
+    }
+
+
+def _delete_call(data):
+    log_action("elearning", "delete", user_id=data.get('user_id'), extra=f"id={data.get('employee_id')}")
+    log_odoo_session_usage(data['user_id'], data['session_id'], "Delete E-learning")
+    return {
+        'session_id': data['session_id'],
+        'model': 'hr.employee',
+        'method': 'unlink',
+        'args': [[int(data['elearning_id'])]],
+    }
 
 
 @swagger_auto_schema(
@@ -38,44 +125,12 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 def odoo_elearning_create(request):
     try:
         data = request.data
-
-        for key in ['user_id', 'session_id', 'employee_id']:
-            if key not in data:
-                log_warning("elearning", f"missing key: {key}", user_id=data.get('user_id'))
-                return JsonResponse({'status': 'error', 'message': f'Missing key: {key}'}, status=400)
-
-        log_action("elearning", "create", user_id=data['user_id'])
-        log_odoo_session_usage(data['user_id'], data['session_id'], "Create E-learning")
-
-        res = odoo_rpc_call(
-            session_id=data['session_id'],
-            model='hr.employee',
-            method='create',
-            args=[[{
-                'name': data['name'],
-                'course_name': data.get('course_name'),
-                'course_department': data.get('course_department'),
-                'course_progress': data.get('course_progress')
-            }]]
-        )
-
-        if 'error' in res:
-            log_warning("elearning", f"odoo error: {res['error'].get('message')}", user_id=data['user_id'])
-            return JsonResponse({
-                'status': 'error',
-                'message': res['error'].get('message', 'Unknown Odoo error')
-            }, status=400)
-
-        return JsonResponse({
-            'status': 'success',
-            'elearning_id': res['result']
-        })
-
+        missing = _missing_create_key(data)
+        if missing:
+            return missing
+        return _create_response(data, odoo_rpc_call(**_create_call(data)))
     except Exception as e:
-        return JsonResponse({
-            'status': 'error',
-            'message': log_exception(e)
-        }, status=400)
+        return _error_response(e)
 
 @swagger_auto_schema(
     method='get',
@@ -106,30 +161,14 @@ def odoo_elearning_create(request):
 @permission_classes([IsAuthenticated, IsEndpointAllowed])
 def odoo_elearning_read(request):
     try:
-        print("Authorization header:", request.headers.get('Authorization'))
-        jwt = JWTAuthentication()
-        user, validated_token = jwt.authenticate(request)
-        print("Authentication result:", user, validated_token)
-
-        session_id = validated_token['session_id']
-        user_id = validated_token['uid']
-        employee_id = request.GET.get('employee_id')
-
-        domain = [('id', '=', int(employee_id))] if employee_id else []
-        
-        log_action("elearning", "read", user_id=user_id)
-        log_odoo_session_usage(user_id, session_id, "Read E-learning")
-
-        res = odoo_rpc_call(
-            session_id=session_id,
-            model='hr.employee',
-            method='search_read',
-            args=[domain, ['course_name', 'course_department', 'course_progress']]
+        user_id, session_id, domain = _read_query(request)
+        res = cached_search_read(
+            user_id, 'hr.employee', domain, ELEARNING_FIELDS,
+            lambda: odoo_rpc_call(session_id, 'hr.employee', 'search_read', [domain, ELEARNING_FIELDS]),
         )
-
         return JsonResponse({'status': 'success', 'data': res['result']})
     except Exception as e:
-        return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
+        return _error_response(e)
 
 @swagger_auto_schema(
     method='put',
@@ -160,25 +199,10 @@ def odoo_elearning_read(request):
 @permission_classes([IsAuthenticated, IsEndpointAllowed])
 def odoo_elearning_update(request):
     try:
-        data = request.data
-        
-        log_action("elearning", "update", user_id=data.get('user_id'), extra=f"id={data.get('employee_id')}")
-        log_odoo_session_usage(data['user_id'], data['session_id'], "Update E-learning")
-        
-        update_fields = {}
-        for key in ['course_name', 'course_department', 'course_progress']:
-            if key in data:
-                update_fields[key] = data[key]
-
-        res = odoo_rpc_call(
-            session_id=data['session_id'],
-            model='hr.employee',
-            method='write',
-            args=[[int(data['employee_id'])], update_fields]
-        )
+        res = odoo_rpc_call(**_update_call(request.data))
         return JsonResponse({'status': 'success', 'updated': res})
     except Exception as e:
-        return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
+        return _error_response(e)
 
 @swagger_auto_schema(
     method='delete',
@@ -205,17 +229,51 @@ def odoo_elearning_update(request):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated, IsEndpointAllowed])
 def odoo_elearning_delete(request):
+    try:
+        res = odoo_rpc_call(**_delete_call(request.data))
+        return JsonResponse({'status': 'success', 'deleted': res['result']})
+    except Exception as e:
+        return _error_response(e)
+
+
+@async_api_view(['POST'])
+async def aodoo_elearning_create(request):
     try:
         data = request.data
-        log_action("elearning", "delete", user_id=data.get('user_id'), extra=f"id={data.get('employee_id')}")
-        log_odoo_session_usage(data['user_id'], data['session_id'], "Delete E-learning")
-        res = odoo_rpc_call(
-            uid=data['user_id'],
-            session_id=data['session_id'],
-            model='hr.employee',
-            method='unlink',
-            args=[[int(data['elearning_id'])]]
+        missing = _missing_create_key(data)
+        if missing:
+            return missing
+        return _create_response(data, await aodoo_rpc_call(**_create_call(data)))
+    except Exception as e:
+        return _error_response(e)
+
+
+@async_api_view(['GET'])
+async def aodoo_elearning_read(request):
+    try:
+        user_id, session_id, domain = _read_query(request)
+        res = await acached_search_read(
+            user_id, 'hr.employee', domain, ELEARNING_FIELDS,
+            lambda: aodoo_rpc_call(session_id, 'hr.employee', 'search_read', [domain, ELEARNING_FIELDS]),
         )
+        return JsonResponse({'status': 'success', 'data': res['result']})
+    except Exception as e:
+        return _error_response(e)
+
+
+@async_api_view(['PUT'])
+async def aodoo_elearning_update(request):
+    try:
+        res = await aodoo_rpc_call(**_update_call(request.data))
+        return JsonResponse({'status': 'success', 'updated': res})
+    except Exception as e:
+        return _error_response(e)
+
+
+@async_api_view(['DELETE'])
+async def aodoo_elearning_delete(request):
+    try:
+        res = await aodoo_rpc_call(**_delete_call(request.data))
         return JsonResponse({'status': 'success', 'deleted': res['result']})
     except Exception as e:
-        return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
\ No newline at end of file
+        return _error_response(e)
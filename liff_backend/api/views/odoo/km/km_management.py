@@ -5,8 +5,65 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from api.utils.permissions import IsEndpointAllowed
 from api.utils.logger import log_action, log_warning, log_exception
-from api.utils.odoo import odoo_rpc_call, log_odoo_session_usage
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from api.utils.async_views import async_api_view
+from api.utils.odoo import aodoo_rpc_call, odoo_rpc_call, log_odoo_session_usage
+
+KM_REQUIRED_FIELDS = ['session_id', 'user_id', 'course_id', 'student_name', 'analytics']
+
+
+def _enrollment_payload(data):
+    payload = {
+        'user_id': str(data['user_id']),
+        'course_id': data['course_id'],
+        'student_name': data['student_name'],
+        'analytics': data['analytics']
+    }
+
+    if 'status' in data:
+        payload['status'] = data['status']
+    if 'courseName' in data:
+        payload['course_name'] = data['courseName']
+    if 'createdAt' in data:
+        payload['created_at'] = data['createdAt']
+    if 'updatedAt' in data:
+        payload['updated_at'] = data['updatedAt']
+    return payload
+
+
+def _missing_field(data):
+    for field in KM_REQUIRED_FIELDS:
+        if field not in data:
+            log_warning("kovic.km", f"missing field: {field}", user_id=data.get('user_id'))
+            return JsonResponse({'status': 'error', 'message': f'Missing field: {field}'}, status=400)
+    return None
+
+
+def _enrollment_call(data):
+    log_action("elearning.analytics", "sync", user_id=data['user_id'])
+    log_odoo_session_usage(data['user_id'], data['session_id'], "Sync E-learning Analytics")
+    return {
+        'session_id': data['session_id'],
+        'model': 'kovic.km.enrollment',
+        'method': 'create_enrollment_from_api',
+        'args': [_enrollment_payload(data)],
+    }
+
+
+def _enrollment_response(data, res):
+    log_action("kovic.km", f"Odoo response: {res}", user_id=data['user_id'])
+
+    if 'error' in res:
+        log_warning("kovic.km", f"Odoo error: {res['error']}", user_id=data['user_id'])
+        return JsonResponse({
+            'status': 'error',
+            'odoo_error': res['error'],
+            'message': res['error'].get('message', 'Unknown Odoo error')
+        }, status=400)
+
+    return JsonResponse({
+        'status': 'success',
+        'result': res['result']
+    })
 
 
 @swagger_auto_schema(
@@ -69,52 +126,23 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 def odoo_km_create(request):
     try:
         data = request.data
-        required_fields = ['session_id', 'user_id', 'course_id', 'student_name', 'analytics']
-        for field in required_fields:
-            if field not in data:
-                log_warning("kovic.km", f"missing field: {field}", user_id=data.get('user_id'))
-                return JsonResponse({'status': 'error', 'message': f'Missing field: {field}'}, status=400)
-
-        log_action("elearning.analytics", "sync", user_id=data['user_id'])
-        log_odoo_session_usage(data['user_id'], data['session_id'], "Sync E-learning Analytics")
-
-        payload = {
-            'user_id': str(data['user_id']),
-            'course_id': data['course_id'],
-            'student_name': data['student_name'],
-            'analytics': data['analytics']
-        }
+        missing = _missing_field(data)
+        if missing:
+            return missing
+        return _enrollment_response(data, odoo_rpc_call(**_enrollment_call(data)))
 
-        if 'status' in data:
-            payload['status'] = data['status']
-        if 'courseName' in data:
-            payload['course_name'] = data['courseName']
-        if 'createdAt' in data:
-            payload['created_at'] = data['createdAt']
-        if 'updatedAt' in data:
-            payload['updated_at'] = data['updatedAt']
-
-        res = odoo_rpc_call(
-            session_id=data['session_id'],
-            model='kovic.km.enrollment',
-            method='create_enrollment_from_api',
-            args=[payload]
-        )
-
-        log_action("kovic.km", f"Odoo response: {res}", user_id=data['user_id'])
-
-        if 'error' in res:
-            log_warning("kovic.km", f"Odoo error: {res['error']}", user_id=data['user_id'])
-            return JsonResponse({
-                'status': 'error',
-                'odoo_error': res['error'],
-                'message': res['error'].get('message', 'Unknown Odoo error')
-            }, status=400)
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
 
-        return JsonResponse({
-            'status': 'success',
-            'result': res['result']
-        })
+
+@async_api_view(['POST'])
+async def aodoo_km_create(request):
+    try:
+        data = request.data
+        missing = _missing_field(data)
+        if missing:
+            return missing
+        return _enrollment_response(data, await aodoo_rpc_call(**_enrollment_call(data)))
 
     except Exception as e:
-        return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
\ No newline at end of file
+        return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
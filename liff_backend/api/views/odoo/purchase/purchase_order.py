@@ -4,9 +4,40 @@ from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from api.utils.logger import log_exception, log_action, log_warning
-from api.utils.odoo import odoo_rpc_call, log_odoo_session_usage
+from api.utils.async_views import async_api_view
+from api.utils.odoo import aodoo_rpc_call, odoo_rpc_call, log_odoo_session_usage
 from api.utils.permissions import IsEndpointAllowed
 
+
+def _approve_request(data):
+    """(session_id, user_id, po_id, po_name) from the request body."""
+    session_id = data['session_id']
+    user_id = int(data['user_id'])
+    po_id = data.get('po_id')
+    po_name = data.get('po_name')
+
+    log_action("purchase_order", "approve", user_id=user_id, extra=f"po_id={po_id}, po_name={po_name}")
+    log_odoo_session_usage(user_id, session_id, f"Approve PO (ID: {po_id or po_name})")
+    return session_id, user_id, po_id, po_name
+
+
+def _search_po_call(session_id, po_name):
+    return {'session_id': session_id, 'model': 'purchase.order', 'method': 'search', 'args': [[['name', '=', po_name]]]}
+
+
+def _approve_po_call(session_id, ids):
+    return {'session_id': session_id, 'model': 'purchase.order', 'method': 'button_confirm_approve', 'args': [ids]}
+
+
+def _missing_po(user_id):
+    log_warning("purchase_order", "missing po_id or po_name", user_id=user_id)
+    return JsonResponse({'status': 'error', 'message': 'Missing po_id or po_name'}, status=400)
+
+
+def _approved_response(res):
+    return JsonResponse({'status': 'success', 'message': 'PO approved successfully', 'output': res})
+
+
 @swagger_auto_schema(
     method='post',
     request_body=openapi.Schema(
@@ -24,29 +55,30 @@ from api.utils.permissions import IsEndpointAllowed
 @permission_classes([IsAuthenticated, IsEndpointAllowed])
 def odoo_approve_po(request):
     try:
-        data = request.data
-        session_id = data['session_id']
-        user_id = int(data['user_id'])
-        po_id = data.get('po_id')
-        po_name = data.get('po_name')
-        
-        log_action("purchase_order", "approve", user_id=user_id, extra=f"po_id={po_id}, po_name={po_name}")
-        log_odoo_session_usage(user_id, session_id, f"Approve PO (ID: {po_id or po_name})")
-        
+        session_id, user_id, po_id, po_name = _approve_request(request.data)
         if po_id:
-            res = odoo_rpc_call(
-                session_id=data['session_id'],
-                model='purchase.order',
-                method='button_confirm_approve',
-                args=[[po_id]]
-            )
+            res = odoo_rpc_call(**_approve_po_call(session_id, [po_id]))
         elif po_name:
-            search = odoo_rpc_call(user_id, session_id, 'purchase.order', 'search', [[['name', '=', po_name]]])
-            res = odoo_rpc_call(user_id, session_id, 'purchase.order', 'button_confirm_approve', [[search['result']]])
+            search = odoo_rpc_call(**_search_po_call(session_id, po_name))
+            res = odoo_rpc_call(**_approve_po_call(session_id, [search['result']]))
         else:
-            log_warning("purchase_order", "missing po_id or po_name", user_id=user_id)
-            return JsonResponse({'status': 'error', 'message': 'Missing po_id or po_name'}, status=400)
+            return _missing_po(user_id)
+        return _approved_response(res)
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
+
 
-        return JsonResponse({'status': 'success', 'message': 'PO approved successfully', 'output': res})
+@async_api_view(['POST'])
+async def aodoo_approve_po(request):
+    try:
+        session_id, user_id, po_id, po_name = _approve_request(request.data)
+        if po_id:
+            res = await aodoo_rpc_call(**_approve_po_call(session_id, [po_id]))
+        elif po_name:
+            search = await aodoo_rpc_call(**_search_po_call(session_id, po_name))
+            res = await aodoo_rpc_call(**_approve_po_call(session_id, [search['result']]))
+        else:
+            return _missing_po(user_id)
+        return _approved_response(res)
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': log_exception(e)}, status=400)
@@ -1,26 +1,39 @@
+from django.conf import settings
 from django.urls import path
-from .auth_views import odoo_login
+from .auth_views import odoo_login, aodoo_login
 from .token import setup_token_permissions, update_permission_scope, rotate_token
 from .hr.hr_employee import (
     odoo_elearning_create, odoo_elearning_read,
     odoo_elearning_update, odoo_elearning_delete,
+    aodoo_elearning_create, aodoo_elearning_read,
+    aodoo_elearning_update, aodoo_elearning_delete,
 )
-from .purchase.purchase_order import odoo_approve_po
-from .km.km_management import odoo_km_create
-from api.views.odoo.auto_resolver import AutoResolverAPI
+from .purchase.purchase_order import odoo_approve_po, aodoo_approve_po
+from .km.km_management import odoo_km_create, aodoo_km_create
+from api.views.odoo.auto_resolver import AutoResolverAPI, AsyncAutoResolverAPI
+from api.views.odoo.batch_resolver import BatchResolverAPI, AsyncBatchResolverAPI
+
+
+def _view(sync_view, async_view):
+    # Async views only pay off when served by liff_backend.asgi
+    return async_view if settings.GATEWAY_ASYNC else sync_view
+
+
+auto_resolver = _view(AutoResolverAPI, AsyncAutoResolverAPI).as_view()
 
 urlpatterns = [
-    path("login/", odoo_login),
+    path("login/", _view(odoo_login, aodoo_login)),
     path("token/permissions/", setup_token_permissions),
     path("token/update-permission/", update_permission_scope),
     path("token/rotate/", rotate_token),
-    path("e-learning/create/", odoo_elearning_create),
-    path("e-learning/read/", odoo_elearning_read),
-    path("e-learning/update/", odoo_elearning_update),
-    path("e-learning/delete/", odoo_elearning_delete),
-    path("purchase-order/approve/", odoo_approve_po),
-    path("km/create/", odoo_km_create),
+    path("e-learning/create/", _view(odoo_elearning_create, aodoo_elearning_create)),
+    path("e-learning/read/", _view(odoo_elearning_read, aodoo_elearning_read)),
+    path("e-learning/update/", _view(odoo_elearning_update, aodoo_elearning_update)),
+    path("e-learning/delete/", _view(odoo_elearning_delete, aodoo_elearning_delete)),
+    path("purchase-order/approve/", _view(odoo_approve_po, aodoo_approve_po)),
+    path("km/create/", _view(odoo_km_create, aodoo_km_create)),
     
-    path('v1/auto/<str:channel>/<str:module>/<str:action>/', AutoResolverAPI.as_view()),
-    path('v1/auto/<str:channel>/<str:module>/<str:action>/<int:res_id>/', AutoResolverAPI.as_view()),
+    path('v1/batch/', _view(BatchResolverAPI, AsyncBatchResolverAPI).as_view()),
+    path('v1/auto/<str:channel>/<str:module>/<str:action>/', auto_resolver),
+    path('v1/auto/<str:channel>/<str:module>/<str:action>/<int:res_id>/', auto_resolver),
 ]
@@ -2,14 +2,17 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.utils import timezone
 from django.contrib.auth.models import User
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from api.models import OdooJWTToken, AllowedOrigin, AllowedEndpoint, PermissionScope
+from api.models import OdooJWTToken
 from api.utils.logger import log_action, log_warning, log_exception
 from api.utils.permissions import IsEndpointAllowed
+from api.utils.auth_context import get_auth_context
+from api.utils.policy_cache import invalidate_token_policy, load_token_policy, replace_token_pair
+from api.utils.policy_claims import attach_policy_claims
+from api.utils.policy_writes import apply_token_policy
 from datetime import timedelta
 
 
@@ -81,7 +84,7 @@ def setup_token_permissions(request):
             return Response({'error': 'Authorization header missing or malformed'}, status=401)
 
         access_token = auth_header.split(" ")[1]
-        token_record = OdooJWTToken.objects.filter(access_token=access_token).first()
+        token_record = get_auth_context(request).token_record
         if not token_record:
             log_warning("token", "token not found", extra=access_token)
             return Response({'error': 'Token not found in database'}, status=404)
@@ -89,30 +92,16 @@ def setup_token_permissions(request):
         log_action("token", "setup_permissions", user_id=token_record.user_id)
         data = request.data
 
-        AllowedOrigin.objects.filter(token=token_record).delete()
-        for origin in data.get('allowed_origins', []):
-            AllowedOrigin.objects.create(token=token_record, origin=origin)
-
-        AllowedEndpoint.objects.filter(token=token_record).delete()
-        for path in data.get('allowed_endpoints', []):
-            AllowedEndpoint.objects.create(token=token_record, path=path)
-
-        PermissionScope.objects.filter(token=token_record).delete()
-        for scope in data.get('permission_scopes', []):
-            model = scope.get('model_name')
-            if not model:
-                continue
-            PermissionScope.objects.create(
-                token=token_record,
-                model_name=model,
-                can_create=scope.get('can_create', False),
-                can_read=scope.get('can_read', False),
-                can_update=scope.get('can_update', False),
-                can_delete=scope.get('can_delete', False),
-                can_approve=scope.get('can_approve', False),
-                can_reject=scope.get('can_reject', False),
-            )
+        changed = apply_token_policy(
+            token_record,
+            origins=data.get('allowed_origins', []),
+            endpoints=data.get('allowed_endpoints', []),
+            scopes=data.get('permission_scopes', []),
+            replace=True,
+        )
 
+        if changed:
+            invalidate_token_policy(token_record)
         return Response({'status': 'success', 'message': 'Permissions updated successfully'})
 
     except Exception as e:
@@ -179,42 +168,22 @@ def setup_token_permissions(request):
 @permission_classes([IsAuthenticated])
 def update_permission_scope(request):
     try:
-        token = request.headers.get("Authorization", "").replace("Bearer ", "")
-        token_record = OdooJWTToken.objects.filter(access_token=token).first()
+        token_record = get_auth_context(request).token_record
         if not token_record:
             log_warning("permission", "token not found for patch")
             return Response({"error": "Token not found"}, status=404)
 
         data = request.data
 
-        if 'allowed_origins' in data:
-            for origin in data['allowed_origins']:
-                if not AllowedOrigin.objects.filter(token=token_record, origin=origin).exists():
-                    AllowedOrigin.objects.create(token=token_record, origin=origin)
-
-        if 'allowed_endpoints' in data:
-            for endpoint in data['allowed_endpoints']:
-                if not AllowedEndpoint.objects.filter(token=token_record, path=endpoint).exists():
-                    AllowedEndpoint.objects.create(token=token_record, path=endpoint)
-
-        if 'permission_scopes' in data:
-            for scope in data['permission_scopes']:
-                model = scope.get('model_name')
-                if not model:
-                    continue
-                obj, created = PermissionScope.objects.get_or_create(
-                    token=token_record,
-                    model_name=model
-                )
-                updated = False
-                for field in ["can_create", "can_read", "can_update", "can_delete", "can_approve", "can_reject"]:
-                    if field in scope and getattr(obj, field) != scope[field]:
-                        setattr(obj, field, scope[field])
-                        updated = True
-                if updated:
-                    obj.save()
-
+        changed = apply_token_policy(
+            token_record,
+            origins=data.get('allowed_origins'),
+            endpoints=data.get('allowed_endpoints'),
+            scopes=data.get('permission_scopes'),
+        )
 
+        if changed:
+            invalidate_token_policy(token_record)
         log_action("permission", "patched_replace", user_id=token_record.user_id)
         return Response({"status": "success", "message": "Permissions updated"})
 
@@ -260,7 +229,7 @@ def rotate_token(request):
         username = old_refresh.get("username")
         session_id = old_refresh.get("session_id")
 
-        token_record = OdooJWTToken.objects.filter(refresh_token=refresh_str).first()
+        token_record = OdooJWTToken.objects.for_refresh_token(refresh_str).first()
         if not token_record:
             return Response({"error": "Token not found"}, status=404)
 
@@ -269,16 +238,17 @@ def rotate_token(request):
         new_refresh['uid'] = uid
         new_refresh['username'] = username
         new_refresh['session_id'] = session_id
+        attach_policy_claims(new_refresh, lambda: load_token_policy(token_record.pk))
+
+        access_token = str(new_refresh.access_token)
+        refresh_token = str(new_refresh)
+
+        replace_token_pair(token_record, access_token, refresh_token, timezone.now() + timedelta(days=days))
 
-        token_record.access_token = str(new_refresh.access_token)
-        token_record.refresh_token = str(new_refresh)
-        token_record.expires_at = timezone.now() + timedelta(days=days)
-        token_record.save()
-        
         log_action("token", "rotate", user_id=uid)
         return Response({
-            "access": str(new_refresh.access_token),
-            "refresh": str(new_refresh),
+            "access": access_token,
+            "refresh": refresh_token,
             "expires_at": token_record.expires_at.isoformat()
         })
 
@@ -293,12 +263,6 @@ def rotate_token(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsEndpointAllowed])
 def test_jwt(request):
-    print("==== HEADERS ====")
-    for k, v in request.headers.items():
-        print(f"{k}: {v}")
-    print("=================")
-
-    jwt = JWTAuthentication()
-    user_auth = jwt.authenticate(request)
-    print("JWT AUTH RESULT:", user_auth)
+    # Header names only; values carry the bearer token
+    log_action("test_jwt", "authenticated", user_id=request.auth.get('uid'), extra=f"headers={', '.join(request.headers)}")
     return Response({"status": "ok"})
\ No newline at end of file
@@ -29,7 +29,7 @@ ALLOWED_HOSTS = ['*']
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ContextJWTAuthentication',
     ),
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -67,11 +67,117 @@ CACHES = {
         "LOCATION": "redis://redis:6379/1",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # Times each command for the Server-Timing header
+            "REDIS_CLIENT_CLASS": "api.utils.server_timing.TimedRedis",
         }
     }
 }
 
 import os
+import json
+
+# Token policy cache: in-process LRU in front of Redis
+POLICY_CACHE_LOCAL_SIZE = int(os.getenv('POLICY_CACHE_LOCAL_SIZE', 1024))
+POLICY_CACHE_LOCAL_TTL = int(os.getenv('POLICY_CACHE_LOCAL_TTL', 30))
+POLICY_CACHE_TIMEOUT = int(os.getenv('POLICY_CACHE_TIMEOUT', 3600))
+
+# Per-worker cache of verified JWTs and their users; entries never outlive the token's exp
+JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', 4096))
+JWT_CACHE_MAX_TTL = int(os.getenv('JWT_CACHE_MAX_TTL', 900))
+
+# Policy template attached to tokens issued by odoo_login
+GATEWAY_DEFAULT_POLICY_TEMPLATE = os.getenv('GATEWAY_DEFAULT_POLICY_TEMPLATE', 'liff-default')
+# Repeat logins with the same credentials get the cached pair for this many seconds,
+# without calling Odoo or inserting a token row
+GATEWAY_LOGIN_CACHE_TTL = int(os.getenv('GATEWAY_LOGIN_CACHE_TTL', 3600))
+
+# Sign hosts, endpoints and scopes into issued JWTs and authorize from the claims
+GATEWAY_POLICY_CLAIMS = os.getenv('GATEWAY_POLICY_CLAIMS', 'False') == 'True'
+
+# Odoo JSON-RPC client: keep-alive pool per worker and (connect, read) timeouts in seconds
+ODOO_POOL_SIZE = int(os.getenv('ODOO_POOL_SIZE', 20))
+ODOO_CONNECT_TIMEOUT = float(os.getenv('ODOO_CONNECT_TIMEOUT', 3.05))
+ODOO_READ_TIMEOUT = float(os.getenv('ODOO_READ_TIMEOUT', 30))
+# Total time one Odoo call may take, retries included
+ODOO_CALL_DEADLINE = float(os.getenv('ODOO_CALL_DEADLINE', 30))
+# Reads are retried on transport errors and 502/503/504, with full-jitter backoff (seconds)
+ODOO_READ_RETRIES = int(os.getenv('ODOO_READ_RETRIES', 2))
+ODOO_RETRY_BASE_DELAY = float(os.getenv('ODOO_RETRY_BASE_DELAY', 0.1))
+ODOO_RETRY_MAX_DELAY = float(os.getenv('ODOO_RETRY_MAX_DELAY', 2))
+# Per-model circuit breaker: consecutive failures to open, seconds before a probe call
+ODOO_BREAKER_FAILURES = int(os.getenv('ODOO_BREAKER_FAILURES', 5))
+ODOO_BREAKER_RESET_SECONDS = float(os.getenv('ODOO_BREAKER_RESET_SECONDS', 30))
+# Client addresses allowed on internal/ endpoints (metrics, circuit state): loopback plus the comma-separated
+# networks in GATEWAY_INTERNAL_NETWORKS, which the deployment sets to its scraper's address or subnet
+GATEWAY_INTERNAL_NETWORKS = [
+    network.strip() for network in os.getenv('GATEWAY_INTERNAL_NETWORKS', '').split(',') if network.strip()
+]
+INTERNAL_ALLOWED_NETWORKS = ['127.0.0.1/32', '::1/128', *GATEWAY_INTERNAL_NETWORKS]
+# Addresses of the reverse proxy (nginx_gateway). Only requests it relays are judged by the
+# X-Real-IP / X-Forwarded-For it sets; from anyone else those headers are ignored
+GATEWAY_TRUSTED_PROXIES = [
+    network.strip() for network in os.getenv('GATEWAY_TRUSTED_PROXIES', '').split(',') if network.strip()
+]
+# Odoo calls one ASGI worker may keep in flight
+ODOO_ASYNC_MAX_CONNECTIONS = int(os.getenv('ODOO_ASYNC_MAX_CONNECTIONS', 500))
+
+# Route login, e-learning, KM, PO and auto-resolver to their async views (serve liff_backend.asgi)
+GATEWAY_ASYNC = os.getenv('GATEWAY_ASYNC', 'False') == 'True'
+
+# Identical concurrent Odoo reads share one upstream call; with ODOO_SINGLE_FLIGHT_REDIS
+# also across workers, through a Redis lock and a short-lived shared result (seconds)
+ODOO_SINGLE_FLIGHT = os.getenv('ODOO_SINGLE_FLIGHT', 'True') == 'True'
+ODOO_SINGLE_FLIGHT_REDIS = os.getenv('ODOO_SINGLE_FLIGHT_REDIS', 'False') == 'True'
+ODOO_SINGLE_FLIGHT_LOCK_TTL = float(os.getenv('ODOO_SINGLE_FLIGHT_LOCK_TTL', 10))
+ODOO_SINGLE_FLIGHT_RESULT_TTL = float(os.getenv('ODOO_SINGLE_FLIGHT_RESULT_TTL', 1))
+
+# Related records fetched by expand=, cached per id (seconds)
+ODOO_RECORD_CACHE_TTL = int(os.getenv('ODOO_RECORD_CACHE_TTL', 300))
+
+# Models the auto-resolver serves, {model: default read fields}; an empty list picks light
+# fields from fields_get. fields_get metadata is cached for GATEWAY_MODEL_FIELDS_TTL seconds
+GATEWAY_MODELS = json.loads(os.getenv(
+    'GATEWAY_MODELS',
+    '{"hr.employee": ["name", "job_id", "department_id"], "purchase.order": ["name", "state"], '
+    '"hr.job": ["name"], "hr.department": ["name", "manager_id"], "res.partner": ["name", "email", "phone"]}'
+))
+GATEWAY_MODEL_FIELDS_TTL = int(os.getenv('GATEWAY_MODEL_FIELDS_TTL', 3600))
+GATEWAY_MODEL_LIGHT_FIELDS = int(os.getenv('GATEWAY_MODEL_LIGHT_FIELDS', 10))
+
+# search_read results cached per model, {model: ttl seconds}; models not listed always go to Odoo
+ODOO_READ_CACHE_TTL = json.loads(os.getenv('ODOO_READ_CACHE_TTL', '{"hr.employee": 300, "purchase.order": 60}'))
+
+# auto-resolver reads: page size when no limit is given, and the largest allowed limit
+GATEWAY_READ_DEFAULT_LIMIT = int(os.getenv('GATEWAY_READ_DEFAULT_LIMIT', 80))
+GATEWAY_READ_MAX_LIMIT = int(os.getenv('GATEWAY_READ_MAX_LIMIT', 500))
+# Records fetched from Odoo per page for ?stream=ndjson reads
+GATEWAY_STREAM_PAGE_SIZE = int(os.getenv('GATEWAY_STREAM_PAGE_SIZE', 200))
+# Records per bulk create/update/delete/approve/reject call
+GATEWAY_BULK_MAX_RECORDS = int(os.getenv('GATEWAY_BULK_MAX_RECORDS', 100))
+
+# v1/batch/: operations per request and Odoo calls run at once per batch
+GATEWAY_BATCH_MAX_OPERATIONS = int(os.getenv('GATEWAY_BATCH_MAX_OPERATIONS', 20))
+GATEWAY_BATCH_CONCURRENCY = int(os.getenv('GATEWAY_BATCH_CONCURRENCY', 8))
+
+# Expired token sweeper; interval in seconds, 0 leaves it to the sweep_expired_tokens command
+TOKEN_SWEEP_INTERVAL = int(os.getenv('TOKEN_SWEEP_INTERVAL', 0))
+TOKEN_SWEEP_BATCH_SIZE = int(os.getenv('TOKEN_SWEEP_BATCH_SIZE', 1000))
+TOKEN_SWEEP_MAX_BATCHES = int(os.getenv('TOKEN_SWEEP_MAX_BATCHES', 50))
+
+# Metrics at internal/metrics/; each worker adds its samples to Redis every METRICS_FLUSH_INTERVAL seconds
+GATEWAY_METRICS = os.getenv('GATEWAY_METRICS', 'True') == 'True'
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+
+# Server-Timing header with auth, policy, db, redis and odoo durations
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'True') == 'True'
+# One access line per request: route, model, action, status, latency and the phases above
+ACCESS_LOG = os.getenv('ACCESS_LOG', 'True') == 'True'
+# 'json' writes one JSON object per line with request_id, uid and token_id; 'text' keeps the plain lines
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
+# Records buffered for the log writer thread (wsgi/asgi only); beyond this they are dropped and counted. 0 logs synchronously
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -79,23 +185,32 @@ LOGGING = {
         'standard': {
             'format': "[%(asctime)s] [%(levelname)s] %(name)s: %(message)s"
         },
+        'json': {
+            '()': 'api.utils.logger.JSONFormatter',
+        },
+    },
+    'filters': {
+        'request_context': {
+            '()': 'api.utils.logger.RequestContextFilter',
+        },
     },
     'handlers': {
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
-            'formatter': 'standard',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'standard',
         },
         'file': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
             'filename': os.path.join(BASE_DIR, 'logs', 'odoo.log'),
-            'formatter': 'standard',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'standard',
         },
     },
     'loggers': {
         'odoo': {
             'handlers': ['console', 'file'],
+            'filters': ['request_context'],
             'level': 'DEBUG',
             'propagate': True,
         },
@@ -117,6 +232,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.request_id.RequestIDMiddleware',
+    'api.middleware.server_timing.ServerTimingMiddleware',
+    'api.middleware.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -139,7 +257,9 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_HEADERS = list(default_headers) + [
     'authorization',
+    'x-request-id',
 ]
+CORS_EXPOSE_HEADERS = ['X-Request-ID']
 
 
 TEMPLATES = [
@@ -32,6 +32,7 @@ from drf_yasg import openapi
 from api.views.odoo import urls as odoo_urls
 from api.views.line import urls as line_urls
 from api.views.test import urls as test_urls
+from api.views.internal import urls as internal_urls
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -48,6 +49,7 @@ urlpatterns = [
     path('', include(line_urls)),
     path('', include(odoo_urls)),
     path('', include(test_urls)),
+    path('', include(internal_urls)),
     # path("docs/", get_dynamic_schema_view, name="docs-by-host"),
     # Swagger UI
     # path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'liff_backend.settings')
 
 application = get_wsgi_application()
+
+from api.utils.log_queue import start_queue_logging
+from api.utils.metrics import start_metrics_flusher
+from api.utils.token_sweeper import start_token_sweeper
+
+start_queue_logging()
+start_metrics_flusher()
+start_token_sweeper()